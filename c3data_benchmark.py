@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Measures the throughput of the batched c3data upserts (see C3data.upsert_events) against a local stub,
+so no c3data instance or token is needed:
+
+    ./c3data_benchmark.py --events 1000 --batch-sizes 1,10,50 --latency 0.005
+
+The stub answers every request after --latency seconds and fails every event whose id ends with 7,
+like a c3data error for a single field, so the per-event error mapping is exercised as well.
+"""
+import argparse
+import asyncio
+import threading
+import time
+
+from aiohttp import web
+from gql import Client
+from gql.transport.aiohttp import AIOHTTPTransport
+
+import voc.c3data as c3data
+
+
+def stub_app(latency: float) -> web.Application:
+    async def graphql(request):
+        body = await request.json()
+        await asyncio.sleep(latency)
+
+        data, errors = {}, []
+        for name, value in body.get('variables', {}).items():
+            alias = f"e{name.removeprefix('input')}"
+            if str(value['event']['localId']).endswith('7'):
+                data[alias] = None
+                errors.append({'message': f"stub rejected {value['event']['guid']}", 'path': [alias]})
+            else:
+                data[alias] = {'clientMutationId': None}
+        return web.json_response({'data': data, **({'errors': errors} if errors else {})})
+
+    app = web.Application()
+    app.router.add_post('/graphql', graphql)
+    return app
+
+
+def start_stub(latency: float, port: int) -> str:
+    """runs the stub on its own event loop in a daemon thread, returns its url"""
+    loop = asyncio.new_event_loop()
+    runner = web.AppRunner(stub_app(latency))
+    loop.run_until_complete(runner.setup())
+    loop.run_until_complete(web.TCPSite(runner, '127.0.0.1', port).start())
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return f'http://127.0.0.1:{port}/graphql'
+
+
+def inputs(count: int) -> list[tuple[str, dict]]:
+    """(guid, event_input()) pairs like C3data.upsert_events() sends them"""
+    result = []
+    for i in range(count):
+        guid = f'00000000-0000-4000-8000-{i:012d}'
+        result.append((guid, {'event': {
+            'guid': guid,
+            'localId': 1000 + i,
+            'name': f'Event {i}',
+            'startDate': '2025-12-27T11:00:00+01:00',
+            'duration': {'hours': 0, 'minutes': 40},
+            'conferenceId': 1,
+            'roomId': '62251a07-13e4-5a72-bb3c-8528416ee0f2',
+            'eventPeopleUsingGuid': {'create': [{'personId': str(i), 'publicName': f'Speaker {i}'}]},
+        }}))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--events', type=int, default=1000)
+    parser.add_argument('--batch-sizes', default='1,10,50')
+    parser.add_argument('--latency', type=float, default=0.005, help='seconds until the stub answers a request')
+    parser.add_argument('--port', type=int, default=5099)
+    args = parser.parse_args()
+
+    url = start_stub(args.latency, args.port)
+    # the stub has no schema to introspect
+    c3data.client = Client(transport=AIOHTTPTransport(url=url), fetch_schema_from_transport=False)
+
+    events = inputs(args.events)
+    expected = sum(1 for _, data in events if str(data['event']['localId']).endswith('7'))
+
+    for size in map(int, args.batch_sizes.split(',')):
+        failed = {}
+        start = time.perf_counter()
+        for i in range(0, len(events), size):
+            failed.update(c3data.add_events(events[i:i + size]))
+        seconds = time.perf_counter() - start
+
+        print(f'batch size {size:4}: {len(events) / seconds:7.0f} events/s, '
+              f'{len(failed)} failed ({expected} expected) in {seconds:.2f}s')
+
+
+if __name__ == '__main__':
+    main()
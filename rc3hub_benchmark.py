@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Measures the concurrent hub push (see rc3hub.Hub.push) against a local stub hub,
+so no hub instance or token is needed:
+
+    ./rc3hub_benchmark.py --copies 4 --concurrency 1,4 --latency 0.035
+
+The schedule consists of --copies copies of the rooms of the frab-camp2019 example (79 events each).
+The stub answers every request after --latency seconds and rejects the first post of --failures events,
+so every measurement is followed by a rerun on the same ledger, which has to post only those again.
+"""
+import argparse
+import asyncio
+import tempfile
+import threading
+import time
+from os import path
+
+from aiohttp import web
+
+import voc.rc3hub as rc3hub
+from voc.ledger import Ledger
+from voc.schedule import Schedule
+
+EXAMPLE = path.join(path.dirname(__file__), 'validator/json/examples/frab-camp2019.json')
+
+
+def stub_app(schedule: Schedule, latency: float, failures: int) -> web.Application:
+    events = list(schedule.events())
+    rooms = [{'id': str(i), 'name': name} for i, name in enumerate(sorted({e['room'] for e in events}))]
+    tracks = [{'id': i, 'name': name} for i, name in enumerate(sorted({e['track'] for e in events if e['track']}))]
+    failing = set()
+
+    async def reset(request):
+        failing.clear()
+        failing.update(e['guid'] for e in events[:failures])
+        return web.Response(status=204)
+
+    async def listing(request):
+        return web.json_response(tracks if request.match_info['kind'] == 'tracks' else rooms)
+
+    async def post_event(request):
+        await request.json()
+        await asyncio.sleep(latency)
+        guid = request.match_info['guid']
+        if guid in failing:
+            failing.discard(guid)
+            return web.json_response({'error': f'stub rejected {guid} once'}, status=400)
+        return web.json_response({}, status=201)
+
+    app = web.Application()
+    app.router.add_post('/reset', reset)
+    app.router.add_get('/api/c/rc3/{kind:tracks|rooms}', listing)
+    app.router.add_post('/api/c/rc3/event/{guid}/schedule', post_event)
+    return app
+
+
+def start_stub(app: web.Application, port: int) -> str:
+    """runs the stub on its own event loop in a daemon thread, returns its url"""
+    loop = asyncio.new_event_loop()
+    runner = web.AppRunner(app)
+    loop.run_until_complete(runner.setup())
+    loop.run_until_complete(web.TCPSite(runner, '127.0.0.1', port).start())
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return f'http://127.0.0.1:{port}'
+
+
+def copies(count: int) -> Schedule:
+    """the example schedule with its rooms copied count times, with new guids and ids"""
+    schedule = Schedule.from_file(EXAMPLE)
+    for day in schedule.days():
+        rooms = day['rooms']
+        day['rooms'] = {
+            f'{room} {i}': [
+                dict(e, guid=f"{e['guid'][:-4]}{i:04d}", id=int(e['id']) * 100 + i, room=f'{room} {i}')
+                for e in events
+            ]
+            for i in range(count) for room, events in rooms.items()
+        }
+    return schedule
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--copies', type=int, default=4)
+    parser.add_argument('--concurrency', default='1,4', help='at most session.max_per_host requests run in parallel')
+    parser.add_argument('--latency', type=float, default=0.035, help='seconds until the stub answers a request')
+    parser.add_argument('--failures', type=int, default=2)
+    parser.add_argument('--port', type=int, default=5098)
+    args = parser.parse_args()
+
+    schedule = copies(args.copies)
+    url = start_stub(stub_app(schedule, args.latency, args.failures), args.port)
+    rc3hub.url = f'{url}/api/c/rc3/'
+    rc3hub.init([])
+
+    with tempfile.TemporaryDirectory() as directory:
+        for concurrency in map(int, args.concurrency.split(',')):
+            rc3hub.concurrency = concurrency
+            rc3hub.session.post(f'{url}/reset')
+            ledger = Ledger(path.join(directory, f'ledger-{concurrency}.sqlite'))
+
+            for run in ['push', 'rerun']:
+                start = time.perf_counter()
+                report = rc3hub.hub.push(schedule, ledger)
+                seconds = time.perf_counter() - start
+                print(f'concurrency {concurrency:2} {run:5}: {len(report.pushed)} of '
+                      f'{len(list(schedule.events()))} events pushed, {len(report.failed)} failed in {seconds:.2f}s')
+            ledger.close()
+
+
+if __name__ == '__main__':
+    main()
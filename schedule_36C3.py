@@ -1,12 +1,13 @@
 #!/usr/bin/env python3
 # -*- coding: UTF-8 -*-
 
-import json
 import pytz
 import os
 import sys
 import optparse
-from voc.schedule import Schedule, ScheduleEncoder, Event
+from voc.eventfiles import EventFiles
+from voc.schedule import Schedule, Event
+from voc.tools import commit_changes_if_something_relevant_changed
 
 tz = pytz.timezone('Europe/Amsterdam')
 
@@ -236,11 +237,9 @@ def main():
 
     # write separate file for each event, to get better git diffs
     #full_schedule.foreach_event(lambda event: event.export('events/'))
-    def export_event(event):
-        with open("events/{}.json".format(event['guid']), "w") as fp:
-            json.dump(event, fp, indent=2, cls=ScheduleEncoder)
-
-    full_schedule.foreach_event(export_event)
+    # only changed files are written, stale ones were never removed here
+    with EventFiles('events', clean=False) as files:
+        full_schedule.foreach_event(files.write_event)
 
     print('\nDone')
     print('  version: ' + full_schedule.version())
@@ -250,18 +249,7 @@ def main():
         print('   - ' + room)
 
     if not local or options.git:
-        content_did_not_change = os.system('/usr/bin/env git diff -U0 --no-prefix | grep -e "^[+-]  " | grep -v version > /dev/null')
-
-        def git(args):
-            os.system('/usr/bin/env git {}'.format(args))
-
-        if content_did_not_change:
-            print('nothing relevant changed, reverting to previous state')
-            git('reset --hard')
-        else:
-            git('add *.json *.xml events/*.json')
-            git('commit -m "version {}"'.format(full_schedule.version()))
-            git('push')
+        commit_changes_if_something_relevant_changed(full_schedule)
 
 if __name__ == '__main__':
     main()
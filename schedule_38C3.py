@@ -1,7 +1,6 @@
 #!/usr/bin/env python3
 # -*- coding: UTF-8 -*-
 
-import os
 from typing import List
 import requests
 import json
@@ -21,13 +20,14 @@ from voc import (
     Logger,
 )
 
+from voc import publish
 from voc.c3data import C3data
-from git import Repo
+from voc.eventfiles import EventFiles
+from voc.generic import fetch_schedules
 
 # from voc.schedule import set_validator_filter
 from voc.tools import (
     commit_changes_if_something_relevant_changed,
-    git,
     harmonize_event_type,
     write,
     ensure_folders_exist,
@@ -174,12 +174,9 @@ def create_sendezentrum_schedule():
         'Saal X 07': Room(name='Saal X 07', guid='f3483ff0-d680-5aed-8f8b-8fc9e1918940')
     })
 
-    optouts = himmel3_schedule.foreach_event(lambda e: e['guid'] if e['do_not_record'] else None)
+    optouts = himmel3_schedule.remove_events(filter=lambda e: e['do_not_record'])
 
-    print(f" Removing {len(optouts)} recording optout events from engelsystem sendezentrum schedule")
-
-    for guid in optouts:
-        himmel3_schedule.remove_event(guid=guid)
+    print(f" Removed {len(optouts)} recording optout events from engelsystem sendezentrum schedule")
 
     himmel3_schedule.export("himmel3")
     return True
@@ -220,11 +217,11 @@ def main():
 
     merge_schedules = False
     if True:
-        # get events from subconferences
-        for entry in subconferences:
+        # get events from subconferences, downloaded in parallel but processed in the configured order
+        for entry, fetch in fetch_schedules(subconferences, base_schedule):
             try:
                 print(f"\n== Source {entry['name']} \n")
-                schedule = entry.schedule(base_schedule)
+                schedule = fetch()
                 loaded_schedules[entry["name"]] = schedule
 
                 if schedule.get("version"):
@@ -261,13 +258,12 @@ def main():
                 exit()
 
 
-    # to get proper a state, we first have to remove all event files from the previous run
-    if not local or options.git:
-        git("rm events/*  >/dev/null")
-    os.makedirs("events", exist_ok=True)
-
-    fahrplan.foreach_event(lambda e: e.export("events/", "-origin"))
-    everything.foreach_event(lambda e: e.export("events/", "-hub"))
+    # only changed event files are written, and files of removed events deleted (not for local runs without --git)
+    with EventFiles("events", clean=not local or options.git) as files:
+        for event in fahrplan.events():
+            files.write_event(event, "-origin")
+        for event in everything.events():
+            files.write_event(event, "-hub")
     #for schedule in loaded_schedules:
     #   schedule.foreach_event(lambda e: e.export("events/", "-origin"))
 
@@ -281,7 +277,7 @@ def main():
 
 
     # expose metadata to own file
-    with open("meta.json", "w") as fp:
+    with publish.open_json("meta.json") as fp:
         json.dump(
             {
                 "data": {
@@ -320,7 +316,7 @@ def main():
         print("\n== Updating c3data via API…")
 
         c3data = C3data(everything)
-        c3data.process_changed_events(Repo("."), options)
+        c3data.sync(everything, options)
 
 
 if __name__ == "__main__":
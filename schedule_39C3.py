@@ -1,7 +1,6 @@
 #!/usr/bin/env python3
 # -*- coding: UTF-8 -*-
 
-import os
 from typing import List
 import dateutil
 import requests
@@ -12,7 +11,6 @@ import optparse
 from datetime import datetime
 
 from locations.cch import CCH
-Rooms = CCH.Rooms
 
 from voc import (
     GenericConference,
@@ -26,17 +24,20 @@ from voc import (
 )
 
 from voc.c3data import C3data
-from git import Repo
+from voc.eventfiles import EventFiles
+from voc.generic import fetch_schedules
+from voc.fanout import Variant, fan_out, export_all
 
 # from voc.schedule import set_validator_filter
 from voc.tools import (
     commit_changes_if_something_relevant_changed,
-    git,
     write,
     ensure_folders_exist,
     gen_uuid,
 )
 
+Rooms = CCH.Rooms
+
 tz = pytz.timezone("Europe/Amsterdam")
 local = False
 
@@ -245,49 +246,34 @@ def create_block_schedule():
     block_schedule.export("block")
 
 
-def create_himmel_schedule(fahrplan):
-    himmel_schedule = fahrplan.copy("Himmel")
-    himmel_schedule.rename_rooms({
+def create_himmel_schedules(fahrplan):
+    himmel_rooms = {
         "One":    Rooms.S1,
         "Ground": Rooms.SG,
         "Zero":   Rooms.SZ,
         "Fuse":   Rooms.SF,
-    })
+    }
+
+    optouts = 0
 
-    def update_guid(e):
-        e['guid'] = gen_uuid(f"{xc3}-himmel-evac-{e['guid']}")
-        return e
-    himmel_schedule.foreach_event(update_guid)
+    def recorded(e):
+        # Remove events in Sendezentrum Bühne, that have do_not_record set
+        nonlocal optouts
+        if e['do_not_record'] and himmel_rooms.get(e['room']) == Rooms.SZ:
+            optouts += 1
+            return False
+        return True
 
-    # Remove events in Sendezentrum Bühne, that have do_not_record set
-    optouts = himmel_schedule.foreach_event(lambda e: e['guid'] if e['do_not_record'] and e['room'] == Rooms.SZ.name else None)
-    print(f" Removing {len(optouts)} recording optout events from engelsystem sendezentrum schedule")
-    for guid in optouts:
-        himmel_schedule.remove_event(guid=guid)
+    himmel_schedule, himmel2_schedule = fan_out(fahrplan, [
+        Variant("Himmel", rooms=himmel_rooms, namespace=f"{xc3}-himmel-evac", filter=recorded),
+        Variant("Himmel Door", rooms=himmel_rooms, namespace=f"{xc3}-himmel-door"),
+    ])
+    print(f" Removed {optouts} recording optout events from engelsystem sendezentrum schedule")
 
     #himmel_schedule.remove_room("Fuse")
     himmel_schedule.print_stats()
-    himmel_schedule.export("himmel")
-
-
-def create_himmel_door_schedule(fahrplan):
-    himmel2_schedule = fahrplan.copy("Himmel Door")
-    himmel2_schedule.rename_rooms(
-        {
-            "One":    Rooms.S1,
-            "Ground": Rooms.SG,
-            "Zero":   Rooms.SZ,
-            "Fuse":   Rooms.SF,
-        }
-    )
-
-    def update_guid(e):
-        e['guid'] = gen_uuid(f"{xc3}-himmel-door-{e['guid']}")
-        return e
-    himmel2_schedule.foreach_event(update_guid)
-
     himmel2_schedule.print_stats()
-    himmel2_schedule.export("himmel2")
+    export_all({"himmel": himmel_schedule, "himmel2": himmel2_schedule})
 
 
 class Congress:
@@ -400,11 +386,11 @@ class Congress:
         local = ensure_folders_exist(output_dir, secondary_output_dir)
 
     def merge_schedules(self, merge=True):
-        # get events from subconferences
-        for entry in self.subconferences:
+        # get events from subconferences, downloaded in parallel but merged in the configured order
+        for entry, fetch in fetch_schedules(self.subconferences, self.base_schedule):
             try:
                 print(f"\n== Source {entry['name']} \n")
-                schedule = entry.schedule(self.base_schedule)
+                schedule = fetch()
                 self.loaded_schedules[entry["name"]] = schedule
 
                 if schedule.get("version"):
@@ -470,8 +456,7 @@ def main():
     # use -t create_block_schedule and/or -t create_buildupteardown_schedule CLI options
     # create_block_schedule()
     # create_buildupteardown_schedule()
-    create_himmel_schedule(voc)
-    create_himmel_door_schedule(voc)
+    create_himmel_schedules(voc)
 
     everything = conference.hub.schedule()
 
@@ -480,18 +465,17 @@ def main():
     conference.schedule_stats(fahrplan)
     '''
 
-    # to get proper a state, we first have to remove all event files from the previous run
-    if not local or options.git:
-        git("rm events/*  >/dev/null")
-    os.makedirs("events", exist_ok=True)
-
-    #fahrplan.foreach_event(lambda e: e.export("events/", "-origin"))
-    everything.foreach_event(lambda e: e.export("events/", "-hub"))
+    # only changed event files are written, and files of removed events deleted (not for local runs without --git)
+    with EventFiles("events", clean=not local or options.git) as files:
+        #for event in fahrplan.events():
+        #    files.write_event(event, "-origin")
+        for event in everything.events():
+            files.write_event(event, "-hub")
 
     write("\nExporting... ")
 
     # set_validator_filter('strange')
-    everything.export("everything")
+    everything.export("everything", delta=True, conflicts=True)
 
     print("\nDone")
     print("  hub      version: " + everything.version())
@@ -511,7 +495,7 @@ def main():
         print("\n== Updating c3data via API…")
 
         c3data = C3data(everything)
-        c3data.process_changed_events(Repo("."), options)
+        c3data.sync(everything, options)
 
 
 if __name__ == "__main__":
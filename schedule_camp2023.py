@@ -1,7 +1,6 @@
 #!/usr/bin/env python3
 # -*- coding: UTF-8 -*-
 
-import os
 from typing import List
 import requests
 import json
@@ -14,7 +13,6 @@ from voc import (
     GenericConference,
     PretalxConference,
     WebcalConference,
-    Event,
     Schedule,
     ScheduleEncoder,
     ScheduleException,
@@ -22,13 +20,14 @@ from voc import (
     Logger,
 )
 
+from voc import publish
 from voc.c3data import C3data
-from git import Repo
+from voc.generic import fetch_schedules
+from voc.git import export_event_files
 
 # from voc.schedule import set_validator_filter
 from voc.tools import (
     commit_changes_if_something_relevant_changed,
-    git,
     harmonize_event_type,
     write,
     ensure_folders_exist,
@@ -161,11 +160,11 @@ def main():
     # for key in rooms:
     #     full_schedule.add_rooms(rooms[key])
 
-    # add events to full_schedule
-    for entry in conferences:
+    # add events to full_schedule, the sources are downloaded in parallel but merged in the configured order
+    for entry, fetch in fetch_schedules(conferences, base_schedule):
         try:
             print(f"\n== Source {entry['name']} \n")
-            schedule = entry.schedule(base_schedule)
+            schedule = fetch()
 
             if schedule.get('version'):
                 full_schedule['version'] += f"; {entry['name']}"
@@ -218,31 +217,8 @@ def main():
     full_schedule.foreach_event(harmonize_event_type, options)
 
 
-    # to get proper a state, we first have to remove all event files from the previous run
-    if not local or options.git:
-        git("rm events/*  >/dev/null")
-    os.makedirs('events', exist_ok=True)
-
-    # write seperate file for each event, to get better git diffs
-    # TODO: use Event.export()
-    def export_event(event: Event):
-        origin_system = None
-        if isinstance(event, Event):
-            origin_system = event.origin.origin_system
-
-        with open("events/{}.json".format(event["guid"]), "w") as fp:
-            json.dump(
-                {
-                    **event,
-                    "room_id": full_schedule._room_ids.get(event["room"], None),
-                    "origin": origin_system or None,
-                },
-                fp,
-                indent=2,
-                cls=ScheduleEncoder,
-            )
-
-    full_schedule.foreach_event(export_event)
+    # write separate file for each event, to get better git diffs
+    export_event_files(full_schedule, options, local)
 
     # remove overlapping 'Lötworkshop mit Lötchallenge'
     #full_schedule.remove_event(guid='bd75d959-dad1-43b4-81fb-33dfb43c10ec')
@@ -276,7 +252,7 @@ def main():
     cleaned_schedule.export("channels2")
 
     # expose metadata to own file
-    with open("meta.json", "w") as fp:
+    with publish.open_json("meta.json") as fp:
         json.dump(
             {
                 "data": {
@@ -322,7 +298,7 @@ def main():
         print("\n== Updating c3data via API…")
 
         c3data = C3data(full_schedule)
-        c3data.process_changed_events(Repo('.'), options)
+        c3data.sync(full_schedule, options)
 
 
 if __name__ == "__main__":
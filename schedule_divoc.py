@@ -2,13 +2,13 @@
 # -*- coding: UTF-8 -*-
 import os
 import sys
-import json
 import optparse
 import pytz
-import git as gitlib
 
 from voc.schedule import Schedule, ScheduleEncoder, Event
+from voc import publish
 from voc.c3data import C3data
+from voc.eventfiles import EventFiles
 from voc.tools import write
 
 from wikitable2schedule import fetch_schedule
@@ -157,22 +157,17 @@ def main():
     # write separate file for each event, to get better git diffs
     # full_schedule.foreach_event(lambda event: event.export('events/'))
 
-    # to get proper a state, we first have to remove all event files from the previous run
     if not local or options.git:
-        git('rm events/* 2>/dev/null')
+        with EventFiles('events') as files:
+            for event in full_schedule.events():
+                origin_system = None
+                if isinstance(event, Event):
+                    origin_system = event.origin.origin_system
 
-        def export_event(event: Event):
-            origin_system = None
-            if isinstance(event, Event):
-                origin_system = event.origin.origin_system
-
-            with open("events/{}.json".format(event['guid']), "w") as fp:
-                json.dump({
+                files.write(event['guid'], {
                     **event,
                     'origin': origin_system or None,
-                }, fp, indent=2, cls=ScheduleEncoder)
-
-        full_schedule.foreach_event(export_event)
+                }, cls=ScheduleEncoder)
 
     print('\nDone')
     print('  version: ' + full_schedule.version())
@@ -182,15 +177,11 @@ def main():
         print('   - ' + room)
 
     if not local or options.git:
-        content_did_not_change = os.system('/usr/bin/env git diff -U0 --no-prefix | grep -e "^[+-]  " | grep -v version > /dev/null')
-
-        if content_did_not_change:
+        if not publish.relevant():
             print('nothing relevant changed, reverting to previous state')
-            git('reset --hard')
+            publish.revert()
         else:
-            git('add *.json *.xml')
-            git('commit -m "version {}"'.format(full_schedule.version()))
-            # git('push')
+            publish.commit('version {}'.format(full_schedule.version()), push=False)
 
             push_c3data(full_schedule)
 
@@ -198,9 +189,8 @@ def main():
 def push_c3data(schedule):
     print("\n== Updating c3data via API…")
 
-    repo = gitlib.Repo('.')
     c3data = C3data(schedule)
-    c3data.process_changed_events(repo, options)
+    c3data.sync(schedule, options)
 
     '''
 
@@ -223,9 +213,5 @@ def push_c3data(schedule):
     exit(2)
 
 
-def git(args):
-    os.system('/usr/bin/env git {}'.format(args))
-
-
 if __name__ == '__main__':
     main()
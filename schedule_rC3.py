@@ -9,9 +9,10 @@ import sys
 import optparse
 import git as gitlib
 
-from voc.schedule import Schedule, ScheduleEncoder, Event
-from voc.tools import commit_changes_if_something_relevant_changed, ensure_folders_exist, export_filtered_schedule, git, harmonize_event_type, load_json, write
-from voc import rc3hub
+from voc.schedule import Schedule, ScheduleEncoder
+from voc.git import export_event_files
+from voc.tools import commit_changes_if_something_relevant_changed, ensure_folders_exist, export_filtered_schedule, harmonize_event_type, load_json, write
+from voc import publish, rc3hub
 
 
 tz = pytz.timezone('Europe/Amsterdam')
@@ -169,31 +170,15 @@ def main():
         return not (key in frab_rooms)
     export_filtered_schedule('non-frab', channel_schedule, non_frab_filter)
 
-    # to get proper a state, we first have to remove all event files from the previous run
-    if not local or options.git:
-        git('git remove events/*')
-
     # write separate file for each event, to get better git diffs
-    def export_event(event: Event):
-        origin_system = None
-        if isinstance(event, Event):
-            origin_system = event.origin.origin_system
-
-        with open("events/{}.json".format(event['guid']), "w") as fp:
-            json.dump({
-                **event,
-                'room_id': full_schedule._room_ids.get(event['room'], None),
-                'origin': origin_system or None,
-            }, fp, indent=2, cls=ScheduleEncoder)
-
-    full_schedule.foreach_event(export_event)
+    export_event_files(full_schedule, options, local)
 
     # write all events to one big schedule.json/xml
     write('\nExporting... ')
     full_schedule.export('everything')
 
     # expose metadata to own file
-    with open("meta.json", "w") as fp:
+    with publish.open_json("meta.json") as fp:
         json.dump({
             'data': {
                 'version': full_schedule.version(),
@@ -9,9 +9,11 @@ import sys
 import optparse
 import git as gitlib
 
-from voc.schedule import Schedule, ScheduleEncoder, Event
-from voc.tools import commit_changes_if_something_relevant_changed, ensure_folders_exist, git, harmonize_event_type, load_json, write
-from voc import rc3hub
+from voc.schedule import Schedule, ScheduleEncoder
+from voc.generic import fetch_schedules
+from voc.git import export_event_files
+from voc.tools import commit_changes_if_something_relevant_changed, ensure_folders_exist, harmonize_event_type, load_json, write
+from voc import publish, rc3hub
 
 
 tz = pytz.timezone('Europe/Amsterdam')
@@ -196,6 +198,10 @@ def main():
             full_schedule._room_ids[entry['stage'] or entry['name']] = entry['room_guid']
 
 
+    # download every schedule url once, in parallel
+    urls = {entry['url'].replace('schedule.xml', 'schedule.json') for entry in additional_schedule_urls} - {''}
+    downloads = dict(fetch_schedules(urls, fetch=Schedule.from_url))
+
     # add events from additional_schedule's to full_schedule
     for entry in additional_schedule_urls:
         try:
@@ -207,7 +213,7 @@ def main():
             if url in loaded_schedules:
                 print('  schedule ' + url + ' was already loaded – ignoring')
                 continue
-            other_schedule = Schedule.from_url(url)
+            other_schedule = downloads[url]()
             loaded_schedules[url] = True
 
             if 'version' in other_schedule.schedule():
@@ -258,31 +264,15 @@ def main():
     export_stages_schedule(full_schedule)
     export_streams_schedule(full_schedule)
 
-    # to get proper a state, we first have to remove all event files from the previous run
-    if not local or options.git:
-        git('rm events/*')
-
     # write separate file for each event, to get better git diffs
-    def export_event(event: Event):
-        origin_system = None
-        if isinstance(event, Event):
-            origin_system = event.origin.origin_system
-
-        with open('events/{}.json'.format(event['guid']), 'w') as fp:
-            json.dump({
-                **event,
-                'room_id': full_schedule._room_ids.get(event['room'], None),
-                'origin': origin_system or None,
-            }, fp, indent=2, cls=ScheduleEncoder)
-
-    full_schedule.foreach_event(export_event)
+    export_event_files(full_schedule, options, local)
 
     # write all events to one big schedule.json/xml
     write('\nExporting... ')
     full_schedule.export('everything')
 
     # expose metadata to own file
-    with open('meta.json', 'w') as fp:
+    with publish.open_json('meta.json') as fp:
         json.dump({
             'data': {
                 'version': full_schedule.version(),
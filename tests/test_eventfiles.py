@@ -0,0 +1,27 @@
+import os
+
+from voc.eventfiles import EventFiles
+
+
+def test_stale_files_are_removed_without_previous_state(tmp_path):
+    directory = tmp_path / 'events'
+    directory.mkdir()
+    # e.g. written before EventFiles existed, or in a fresh clone
+    (directory / 'old.json').write_text('{}')
+    (directory / 'kept.json').write_text('{\n  "guid": "kept"\n}')
+
+    with EventFiles(str(directory)) as files:
+        assert files.write('kept', {'guid': 'kept'}) is False
+        assert files.write('new', {'guid': 'new'}) is True
+
+    assert sorted(os.listdir(directory)) == ['kept.json', 'new.json']
+    assert (files.written, files.removed) == (1, 1)
+
+
+def test_local_runs_keep_stale_files(tmp_path):
+    (tmp_path / 'old.json').write_text('{}')
+
+    with EventFiles(str(tmp_path), clean=False) as files:
+        files.write('new', {'guid': 'new'})
+
+    assert sorted(os.listdir(tmp_path)) == ['new.json', 'old.json']
@@ -0,0 +1,87 @@
+import os
+import subprocess
+
+import git
+import pytest
+
+from voc import Schedule, publish
+from voc.eventfiles import EventFiles
+
+EXAMPLE = os.path.join(os.path.dirname(__file__), '..', 'validator/json/examples/frab-camp2019.json')
+
+
+@pytest.fixture
+def checkout(tmp_path, monkeypatch):
+    subprocess.run(['git', 'init', '-q', str(tmp_path)], check=True)
+    monkeypatch.chdir(tmp_path)
+    os.makedirs('events')
+    for name, content in [('everything.schedule.json', '{}'), ('events/old.json', '{}')]:
+        with open(name, 'w') as fp:
+            fp.write(content)
+    env = {'GIT_AUTHOR_NAME': 'test', 'GIT_AUTHOR_EMAIL': 'test@example.org',
+           'GIT_COMMITTER_NAME': 'test', 'GIT_COMMITTER_EMAIL': 'test@example.org'}
+    for key, value in env.items():
+        monkeypatch.setenv(key, value)
+    subprocess.run(['git', 'add', '.'], check=True)
+    subprocess.run(['git', 'commit', '-q', '-m', 'init'], check=True)
+    publish.written.clear()
+    publish.deleted.clear()
+    return tmp_path
+
+
+def test_commit_stages_only_reported_files_in_process(checkout, monkeypatch):
+    with EventFiles('events') as files:
+        files.write('new', {'guid': 'new'})
+    with publish.open_json('meta.json') as fp:
+        fp.write('{"data": {"version": "1"}}')
+    # not reported, e.g. left behind by an editor
+    with open('notes.json', 'w') as fp:
+        fp.write('{}')
+
+    commands = []
+    execute = git.cmd.Git.execute
+
+    def record(self, command, **kwargs):
+        commands.append(command[1])
+        return execute(self, command, **kwargs)
+    monkeypatch.setattr(git.cmd.Git, 'execute', record)
+
+    report = publish.commit('version 2', push=False)
+    # no `git add`, `status`, `diff` or `hash-object`, only the reader of HEAD
+    assert set(commands) <= {'cat-file'}
+
+    assert (report.staged, report.removed) == (2, 1)
+    tree = git.Repo('.').head.commit.tree
+    assert sorted(blob.path for blob in tree.traverse() if blob.type == 'blob') == \
+        ['events/new.json', 'everything.schedule.json', 'meta.json']
+    assert publish.written == {} and publish.deleted == set()
+
+
+def test_open_json_ignores_version_changes(checkout):
+    with publish.open_json('meta.json') as fp:
+        fp.write('{"data": {"version": "1", "rooms": []}}')
+    publish.written.clear()
+
+    with publish.open_json('meta.json') as fp:
+        fp.write('{"data": {"version": "2", "rooms": []}}')
+    assert not publish.relevant()
+
+    with publish.open_json('meta.json') as fp:
+        fp.write('{"data": {"version": "3", "rooms": ["Saal 1"]}}')
+    assert publish.relevant()
+
+
+def test_export_is_relevant_only_with_structural_changes(checkout):
+    schedule = Schedule.from_file(EXAMPLE)
+    schedule.export('everything')
+    assert publish.relevant()
+    publish.written.clear()
+
+    schedule['version'] = 'a new version'
+    schedule.export('everything')
+    assert not schedule.changes()
+    assert not publish.relevant()
+
+    next(schedule.events())['title'] = 'A new title'
+    schedule.export('everything')
+    assert publish.relevant()
@@ -0,0 +1,25 @@
+from voc import Schedule
+
+EXAMPLE = 'validator/json/examples/frab-camp2019.json'
+
+
+def test_event_lookup_after_changes_behind_the_index():
+    schedule = Schedule.from_file(EXAMPLE)
+    first = next(schedule.events())
+    # builds the guid/id index
+    assert schedule.event(first['guid']) is first
+
+    # re-identified through the Event itself
+    old_guid = first['guid']
+    first['guid'] = 'c5a2e44e-9b63-4c8e-9f5c-7f0bd2d6a001'
+    assert schedule.event('c5a2e44e-9b63-4c8e-9f5c-7f0bd2d6a001') is first
+    assert schedule.event(old_guid) is None
+
+    # added through the raw day/room dicts
+    day = schedule.days()[0]
+    room = next(iter(day['rooms']))
+    day['rooms'][room].append({**first._event, 'guid': 'c5a2e44e-9b63-4c8e-9f5c-7f0bd2d6a002', 'id': 99999})
+    assert schedule.event('c5a2e44e-9b63-4c8e-9f5c-7f0bd2d6a002')['id'] == 99999
+
+    schedule.remove_event(guid='c5a2e44e-9b63-4c8e-9f5c-7f0bd2d6a002')
+    assert schedule.event('c5a2e44e-9b63-4c8e-9f5c-7f0bd2d6a002') is None
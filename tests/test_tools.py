@@ -0,0 +1,25 @@
+from datetime import timedelta
+
+import pytest
+
+from voc import Schedule
+from voc.tools import str2timedelta
+
+
+@pytest.mark.parametrize('text, expected', [
+    # schedule durations are hh:mm, see format_duration()
+    ('00:45', timedelta(minutes=45)),
+    ('1:30', timedelta(hours=1, minutes=30)),
+    ('01:02:03', timedelta(hours=1, minutes=2, seconds=3)),
+    ('1:02:03:04', timedelta(days=1, hours=2, minutes=3, seconds=4)),
+    ('1h 30min', timedelta(hours=1, minutes=30)),
+    ('45m', timedelta(minutes=45)),
+])
+def test_str2timedelta(text, expected):
+    assert str2timedelta(text) == expected
+
+
+def test_event_end_follows_hh_mm_duration():
+    event = next(Schedule.from_file('validator/json/examples/frab-camp2019.json').events())
+    assert event['duration'] == '00:30'
+    assert event.end - event.start == timedelta(minutes=30)
@@ -0,0 +1,63 @@
+import argparse
+
+from voc import voctoimport
+
+
+SCHEDULE_XML = '''<?xml version="1.0"?>
+<schedule>
+  <version>1.0</version>
+  <conference>
+    <acronym>test</acronym>
+    <title>Test</title>
+    <base_url>https://example.org/test/</base_url>
+  </conference>
+  <day index="1" date="2025-12-27">
+    <room name="Saal One">
+      <event id="1001" guid="0f7fb3c5-8c2a-4b8e-9c39-3a5ef2a63a01">
+        <date>2025-12-27T11:00:00+01:00</date>
+        <start>11:00</start>
+        <duration>00:40</duration>
+        <room>Saal One</room>
+        <slug>test-1001-opening</slug>
+        <title>Opening</title>
+        <language>en</language>
+        <persons><person id="1">alice</person></persons>
+      </event>
+    </room>
+    <room name="Saal Zero">
+      <event id="1002" guid="0f7fb3c5-8c2a-4b8e-9c39-3a5ef2a63a02">
+        <start>12:00</start>
+        <duration>01:00</duration>
+        <room>Saal Zero</room>
+        <title>Workshop</title>
+        <language>de</language>
+        <persons/>
+      </event>
+    </room>
+  </day>
+</schedule>
+'''
+
+
+def test_run_xml_schedule(tmp_path, monkeypatch):
+    path = tmp_path / 'schedule.xml'
+    path.write_text(SCHEDULE_XML)
+
+    pushed = []
+
+    async def push_events(conference, events, args, on_pushed=None):
+        # convert like the real push, but without talking to import.c3voc.de
+        pushed.extend(voctoimport.event_input(conference, event, args)['event'] for event in events)
+        return {}
+
+    args = argparse.Namespace(
+        conference='test', file=str(path), url=None, acronym=None, room=['Saal Zero'],
+        id=None, guid=None, overwrite_slug=False, ledger=None,
+    )
+    monkeypatch.setattr(voctoimport, 'args', args, raising=False)
+    monkeypatch.setattr(voctoimport, 'get_conference', lambda acronym: {'id': 1, 'slug': acronym, 'title': 'Test'})
+    monkeypatch.setattr(voctoimport, 'push_events', push_events)
+
+    voctoimport.run(args)
+
+    assert [(e['talkid'], e['room'], e['date']) for e in pushed] == [(1002, 'Saal Zero', '2025-12-27T12:00:00')]
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Compares the timestamp parsing of voc.timestamps.parse_datetime with dateutil, which was used before:
+
+    ./timestamps_benchmark.py --copies 128
+
+The schedule consists of --copies copies of the rooms of the frab-camp2019 example (79 events each,
+128 copies are 10112 events). Besides the timings it checks that the JSON and XML exports are the same
+with both parsers.
+"""
+import argparse
+import copy
+import time
+from contextlib import contextmanager
+from os import path
+
+import dateutil.parser
+
+import voc.event
+import voc.schedule
+import voc.timestamps
+from voc import Schedule, ScheduleEncoder
+from voc.tools import dumps_json, parse_json
+
+EXAMPLE = path.join(path.dirname(__file__), 'validator/json/examples/frab-camp2019.json')
+
+
+def copies(count: int) -> dict:
+    """json of the example schedule with its rooms copied count times, with new guids and ids"""
+    with open(EXAMPLE) as fp:
+        data = parse_json(fp.read())
+    for day in data['schedule']['conference']['days']:
+        rooms = day['rooms']
+        day['rooms'] = {
+            f'{room} {i}': [
+                dict(e, guid=f"{e['guid'][:-4]}{i:04d}", id=int(e['id']) * 1000 + i, room=f'{room} {i}')
+                for e in events
+            ]
+            for i in range(count) for room, events in rooms.items()
+        }
+    return data
+
+
+@contextmanager
+def dateutil_parsing():
+    """parses all timestamps via dateutil like before voc.timestamps existed"""
+    modules = [voc.event, voc.schedule]
+    originals = [module.parse_datetime for module in modules]
+    for module in modules:
+        module.parse_datetime = dateutil.parser.parse
+    try:
+        yield
+    finally:
+        for module, original in zip(modules, originals):
+            module.parse_datetime = original
+
+
+def measure(function) -> float:
+    voc.timestamps._fromisoformat.cache_clear()
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def load(data: dict) -> Schedule:
+    """Schedule(json=...) incl. hydrating all events"""
+    schedule = Schedule(json=data)
+    for _ in schedule.events():
+        pass
+    return schedule
+
+
+def exports(schedule: Schedule) -> tuple[str, str]:
+    return dumps_json(schedule.json(), cls=ScheduleEncoder), schedule.xml()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--copies', type=int, default=128)
+    args = parser.parse_args()
+
+    data = copies(args.copies)
+    dates = [e['date'] for day in data['schedule']['conference']['days'] for events in day['rooms'].values() for e in events]
+    print(f'{len(dates)} events')
+
+    before = measure(lambda: [dateutil.parser.parse(d) for d in dates])
+    after = measure(lambda: [voc.timestamps.parse_datetime(d) for d in dates])
+    print(f'  parse all event dates: dateutil {before:.3f}s -> parse_datetime {after:.3f}s')
+
+    # every load gets its own copy, as loading hydrates the events in place
+    inputs = [copy.deepcopy(data), copy.deepcopy(data)]
+    schedules = []
+    with dateutil_parsing():
+        before = measure(lambda: schedules.append(load(inputs[0])))
+    after = measure(lambda: schedules.append(load(inputs[1])))
+    print(f'  Schedule(json=...) incl. hydrating all events: {before:.2f}s -> {after:.2f}s')
+
+    print('  JSON and XML exports are ' + ('byte-identical' if exports(schedules[0]) == exports(schedules[1]) else 'DIFFERENT'))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,11 @@
 import argparse
+from functools import cache
 from os import getenv, path
 import json
+from typing import Iterable
 
 from gql import Client, gql
+from graphql import DocumentNode
 from gql.transport.aiohttp import AIOHTTPTransport
 from gql.transport.exceptions import TransportQueryError
 
@@ -11,6 +14,7 @@ try:
     from .event import Event
     from .room import Room
     from .tools import load_json, write
+    from .ledger import Ledger
     from . import logger
 
 
@@ -21,6 +25,7 @@ except ImportError:
     from schedule import Schedule, Event
     from room import Room
     from tools import load_json, write
+    from ledger import Ledger
     from voc import logger
 
 
@@ -34,6 +39,9 @@ transport = AIOHTTPTransport(
 # Create a GraphQL client using the defined transport
 client = Client(transport=transport, fetch_schema_from_transport=True)
 
+# number of events upserted with one request, see C3data.upsert_events()
+batch_size = int(getenv('C3D_BATCH_SIZE', 50))
+
 
 def create_conference(schedule: Schedule):
     conference = schedule.conference()
@@ -107,7 +115,7 @@ def add_room(conference_id, room: Room):
         upsertRoom(input: $input) {
           room { guid, name, slug, meta }
         }
-      }'''), {'input': {'room': {
+      }'''), variable_values={'input': {'room': {
         **room.graphql(),
         'conferenceId': conference_id
     }
@@ -117,8 +125,8 @@ def add_room(conference_id, room: Room):
     return result['upsertRoom']['room']['guid']
 
 
-def add_event(conference_id, room_id, event: Event):
-    data = {
+def event_input(conference_id, room_id, event: Event):
+    return {
         "event": {
             **(event.graphql()),
             "conferenceId": conference_id,
@@ -131,34 +139,57 @@ def add_event(conference_id, room_id, event: Event):
         }
     }
 
-    query = gql('''
-      mutation upsertEvent($input: UpsertEventInput!) {
-        upsertEvent(input: $input) {
-          clientMutationId
-        }
-      }
-    ''')
 
+@cache
+def upsert_events_query(count: int) -> DocumentNode:
+    """
+    one mutation with count aliased upsertEvent fields e0, e1, … – parsed once per batch size.
+    Every field runs on its own, so a failing event does not affect the others in the same request.
+    """
+    variables = ', '.join(f'$input{i}: UpsertEventInput!' for i in range(count))
+    fields = '\n'.join(f'  e{i}: upsertEvent(input: $input{i}) {{ clientMutationId }}' for i in range(count))
+    return gql(f'mutation upsertEvents({variables}) {{\n{fields}\n}}')
+
+
+def add_events(inputs: list[tuple[str, dict]]) -> dict[str, str]:
+    """upserts (event guid, event_input()) pairs with one request, returns the error messages of failed events by guid"""
+    guids = [guid for guid, _ in inputs]
     try:
-        write('.')
-        client.execute(query, {'input': data})
+        client.execute(upsert_events_query(len(inputs)), variable_values={f'input{i}': data for i, (_, data) in enumerate(inputs)})
+        return {}
+    except TransportQueryError as e:
+        failed = {}
+        for error in e.errors or []:
+            alias = str((error.get('path') or [''])[0])
+            if not (alias.startswith('e') and alias[1:].isdigit()):
+                # not caused by a single event, e.g. the request was rejected as a whole
+                return {guid: error['message'] for guid in guids}
+            failed[guids[int(alias[1:])]] = error['message']
+        return failed
     except Exception as e:
-        print(json.dumps(data, indent=2))
+        return {guid: str(e) for guid in guids}
+
+
+def add_event(conference_id, room_id, event: Event):
+    for message in add_events([(event['guid'], event_input(conference_id, room_id, event))]).values():
+        print(json.dumps(event_input(conference_id, room_id, event), indent=2))
         print()
-        print(e)
+        print(message)
         print()
 
 
-def remove_event(event_guid):
+def remove_event(event_guid) -> bool:
     try:
         client.execute(gql('''
           mutation deleteEvent($guid: UUID!) {
             deleteEvent(input: {guid: $guid}) { deletedEventNodeId }
           }
-        '''), {'guid': event_guid})
+        '''), variable_values={'guid': event_guid})
+        return True
     except Exception as e:
         print(e)
         print()
+        return False
 
 
 class C3data:
@@ -183,43 +214,106 @@ class C3data:
 
         # TODO check for new rooms and create them now
 
-    def upsert_event(self, event: Event):
-        if event['room'] in self.room_ids:
-            room_id = self.room_ids[event['room']]
-        else:
+    def room_id(self, event: Event):
+        if event['room'] not in self.room_ids:
             print('WARNING: Room {} does not exist, creating.'.format(event['room']))
-            room_id = add_room(self.conference_id, Room(name=event['room'], guid=event.get('room_id')))
-            self.room_ids[event['room']] = room_id
-        add_event(self.conference_id, room_id, event)
+            self.room_ids[event['room']] = add_room(self.conference_id, Room(name=event['room'], guid=event.get('room_id')))
+        return self.room_ids[event['room']]
 
-    def depublish_event(self, event_guid):
-        remove_event(event_guid)
+    def upsert_event(self, event: Event):
+        write('.')
+        add_event(self.conference_id, self.room_id(event), event)
+
+    def upsert_events(self, events: Iterable[Event | dict], size: int | None = None) -> dict[str, str]:
+        """
+        Upserts the events with size (default batch_size) events per request, returns the error messages of failed events by guid
+        """
+        size = size or batch_size
+        failed = {}
+        batch = []
+
+        def send():
+            write('.')
+            failed.update(add_events(batch))
+            batch.clear()
+
+        for event in events:
+            try:
+                event = event if isinstance(event, Event) else Event(event)
+                batch.append((event['guid'], event_input(self.conference_id, self.room_id(event), event)))
+            except Exception as e:
+                failed[event['guid']] = str(e)
+            if len(batch) >= size:
+                send()
+        if batch:
+            send()
+
+        for guid, message in failed.items():
+            print(f'\n  failed to upsert {guid}: {message}')
+        return failed
+
+    def depublish_event(self, event_guid) -> bool:
+        return remove_event(event_guid)
+
+    def sync(self, schedule: Schedule, options=None, ledger: Ledger | None = None) -> dict[str, str]:
+        """
+        Pushes exactly the events which changed or were removed since the last successful push recorded in the ledger,
+        returns the error messages of failed events by guid – they stay pending for the next run.
+        """
+        ledger = ledger or Ledger()
+        target = f'c3data/{self.conference_id}'
+        pending = ledger.pending(target, schedule.events())
+        print(f'  {pending}')
+
+        failed = {}
+        try:
+            for start in range(0, len(pending.upserts), batch_size):
+                batch = pending.upserts[start:start + batch_size]
+                failed.update(self.upsert_events([event for event, _ in batch]))
+                ledger.mark_pushed(target, [(event['guid'], hash) for event, hash in batch if event['guid'] not in failed])
+
+            for guid in pending.removed:
+                write('D: ')
+                if self.depublish_event(guid):
+                    ledger.mark_removed(target, [guid])
+        except KeyboardInterrupt:
+            pass
+
+        if failed and options and options.exit_when_exception_occours:
+            raise Exception(f'{len(failed)} events failed to upsert')
+        return failed
 
     def process_changed_events(self, repo: 'Repo', options):
-        changed_items = repo.index.diff('HEAD~1', 'events')
-        for i in changed_items:
-            write(i.change_type + ': ')
+        """pushes the event files changed by the last commit, see sync() for the ledger based variant"""
+        upserts = []
+        removed_guids = []
+        for i in repo.index.diff('HEAD~1', 'events'):
+            if i.change_type == 'D':
+                removed_guids.append(path.splitext(path.basename(i.a_path))[0])
+                continue
             try:
-                if i.change_type == 'D':
-                    event_guid = path.splitext(path.basename(i.a_path))[0]
-                    self.depublish_event(event_guid)
-                else:
-                    event = Event(load_json(i.a_path))
-                    self.upsert_event(event)
-            except KeyboardInterrupt:
-                break
+                upserts.append(Event(load_json(i.a_path)))
             except Exception as e:
                 print(e)
                 if options.exit_when_exception_occours:
                     raise e
 
+        try:
+            write(f'A/M {len(upserts)}: ')
+            failed = self.upsert_events(upserts)
+            if failed and options.exit_when_exception_occours:
+                raise Exception(f'{len(failed)} events failed to upsert')
+
+            for guid in removed_guids:
+                write('D: ')
+                self.depublish_event(guid)
+        except KeyboardInterrupt:
+            pass
 
-def upsert_schedule(schedule: Schedule, create=False):
+
+def upsert_schedule(schedule: Schedule, create=False, ledger: Ledger | None = None):
     c3data = C3data(schedule, create)
-    try:
-        schedule.foreach_event(c3data.upsert_event)
-    except KeyboardInterrupt:
-        pass
+    c3data.sync(schedule, ledger=ledger)
 
 
 def test():
@@ -233,10 +327,11 @@ if __name__ == '__main__':
     parser = argparse.ArgumentParser()
     parser.add_argument('url', action="store", help="url or local path source schedule.json")
     parser.add_argument('--create', action="store_true", default=False)
+    parser.add_argument('--ledger', action="store", help="sqlite file with the state of previous pushes, default see voc/ledger.py")
     args = parser.parse_args()
 
     schedule = Schedule.from_url(args.url) if args.url.startswith('http') else Schedule.from_file(args.url)
-    upsert_schedule(schedule, create=args.create)
+    upsert_schedule(schedule, create=args.create, ledger=Ledger(args.ledger))
 
     print('')
     print('done')
@@ -0,0 +1,129 @@
+import json
+import hashlib
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Iterator
+
+try:
+    from .event import Event
+except ImportError:
+    from event import Event
+
+if TYPE_CHECKING:
+    from .schedule import Schedule
+
+
+# schedule level fields which change on every run and are therefore not relevant
+IGNORED_FIELDS = ['version', 'days', 'base_url']
+
+
+@dataclass
+class EventChange:
+    guid: str
+    event: dict
+    # field name → (old value, new value)
+    fields: dict[str, tuple[Any, Any]]
+
+
+@dataclass
+class ScheduleDiff:
+    """
+    Result of comparing two versions of a schedule by event guid,
+    events are the plain event dicts as they are stored in the schedule
+    """
+    added: list[dict] = field(default_factory=list)
+    removed: list[dict] = field(default_factory=list)
+    changed: list[EventChange] = field(default_factory=list)
+    # changed conference metadata, e.g. rooms: field name → (old value, new value)
+    conference: dict[str, tuple[Any, Any]] = field(default_factory=dict)
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.changed or self.conference)
+
+    def __str__(self):
+        return f"{len(self.added)} added, {len(self.changed)} changed, {len(self.removed)} removed events" \
+            + (f", changed conference fields: {', '.join(self.conference)}" if self.conference else "")
+
+    def upserted(self) -> Iterator[dict]:
+        """all events which have to be created or updated on a target system"""
+        yield from self.added
+        for change in self.changed:
+            yield change.event
+
+    def delta(self, id: str, previous_id: str, version=None, previous_version=None) -> dict:
+        """
+        Compact change document for consumers of a schedule.json: whoever has the version with `previous_id`
+        can apply it to get the version with `id`, everybody else has to fetch the full schedule again.
+        """
+        return {
+            'id': id,
+            'previous_id': previous_id,
+            'version': version,
+            'previous_version': previous_version,
+            'added': {_key(event): event for event in self.added},
+            'updated': {change.guid: change.event for change in self.changed},
+            'removed': [_key(event) for event in self.removed],
+            'conference': {k: new for k, (old, new) in self.conference.items()},
+        }
+
+    def print(self):
+        print(f"  {self}")
+        for event in self.added:
+            print(f"   + {event['guid']} {event['title']}")
+        for change in self.changed:
+            print(f"   ~ {change.guid} {change.event['title']}: {', '.join(change.fields)}")
+        for event in self.removed:
+            print(f"   - {event['guid']} {event['title']}")
+
+
+def _key(event: dict):
+    return event.get('guid') or event.get('id')
+
+
+def _equal(a, b) -> bool:
+    if a == b:
+        return True
+    # values from a freshly generated schedule might still be e.g. tuples or Rooms instead of lists or strings
+    return json.dumps(a, sort_keys=True, default=str) == json.dumps(b, sort_keys=True, default=str)
+
+
+def _changed_fields(old: dict, new: dict, ignore=()) -> dict[str, tuple[Any, Any]]:
+    return {
+        k: (old.get(k), new.get(k))
+        for k in old.keys() | new.keys()
+        if k not in ignore and not _equal(old.get(k), new.get(k))
+    }
+
+
+def content_id(text: str) -> str:
+    """short hash of an exported schedule.json, identifies the versions a delta document connects"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]
+
+
+def raw_events(schedule: 'Schedule') -> Iterator[dict]:
+    """iterates over the plain event dicts, without wrapping (and parsing) them as Event"""
+    for day in schedule.days():
+        for events in day['rooms'].values():
+            for event in events:
+                yield event._event if isinstance(event, Event) else event
+
+
+def diff(old: 'Schedule', new: 'Schedule') -> ScheduleDiff:
+    """compares two schedules by event guid in linear time"""
+    result = ScheduleDiff()
+    previous = {_key(event): event for event in raw_events(old)}
+
+    for event in raw_events(new):
+        old_event = previous.pop(_key(event), None)
+        if old_event is None:
+            result.added.append(event)
+            continue
+
+        fields = _changed_fields(old_event, event)
+        if fields:
+            result.changed.append(EventChange(guid=_key(event), event=event, fields=fields))
+
+    # everything left over does not exist in the new schedule any more
+    result.removed = list(previous.values())
+    result.conference = _changed_fields(old.conference(), new.conference(), ignore=IGNORED_FIELDS)
+
+    return result
@@ -1,15 +1,17 @@
 from dataclasses import dataclass
 import re
+import sys
 import json
 from collections.abc import Mapping
 from typing import Any, TypeVar
-import dateutil.parser
 from datetime import datetime
 
 try:
-    from voc.tools import str2timedelta, format_duration
+    from voc.tools import str2timedelta, format_duration, dump_json
+    from voc.timestamps import parse_datetime
 except ImportError:
-    from tools import str2timedelta, format_duration
+    from tools import str2timedelta, format_duration, dump_json
+    from timestamps import parse_datetime
 
 @dataclass
 class EventSourceInterface:
@@ -21,7 +23,14 @@ class Schedule(EventSourceInterface):
 
 T = TypeVar("T")
 
+# fields with few distinct values, all events share one string object per value instead of a copy each
+INTERNED_FIELDS = ['room', 'track', 'type', 'language', 'recording_license']
+
+
 class Event[T = dict[str, Any]](Mapping):
+    # no per instance __dict__, large schedules (e.g. the hub export) have tens of thousands of events
+    __slots__ = ('_event', 'start', 'duration', 'origin', '_shared')
+
     def __init__(self, data: dict[str, Any] = dict(), start: datetime|None = None, origin: EventSourceInterface|None = None, *,
                  guid: str|None = None, 
                  end: datetime|None = None, 
@@ -34,17 +43,18 @@ class Event[T = dict[str, Any]](Mapping):
         '''
 
         self._event: T = {}
+        self._shared = False
         self.start: datetime
 
         # schedule1 input dict
         if start or 'date' in data:
-            self.start = start or dateutil.parser.parse(data["date"])
+            self.start = start or parse_datetime(data["date"])
             if 'date' not in data:
                 data['date'] = self.start.isoformat()
 
         # schedule2 input dict
         elif 'start' in data:
-            self.start = dateutil.parser.parse(data["start"])
+            self.start = parse_datetime(data["start"])
             # overwrite date + start in data to have a consistent date field for schedule1 export
             data['date'] = data['start']
             data['start'] = self.start.strftime('%H:%M')
@@ -80,7 +90,7 @@ class Event[T = dict[str, Any]](Mapping):
         # also allow end as part of schedule2 input dict
         elif end or 'end' in data:
             if 'end' in data:
-                end = dateutil.parser.parse(data["end"])
+                end = parse_datetime(data["end"])
                 del data['end']
 
             self.duration = end - self.start
@@ -111,6 +121,10 @@ class Event[T = dict[str, Any]](Mapping):
             if field in data and not data[field]:
                 del data[field]
 
+        for field in INTERNED_FIELDS:
+            if isinstance(data.get(field), str):
+                data[field] = sys.intern(data[field])
+
         self._event = data
 
         # generate id from guid, when not set so old apps can still process this event
@@ -126,12 +140,36 @@ class Event[T = dict[str, Any]](Mapping):
     def __getitem__(self, key):
         return self._event.get(key)
 
+    # Mapping derives both from __getitem__, which returns None for missing fields instead of raising KeyError
+    def __contains__(self, key):
+        return key in self._event
+
+    def get(self, key, default=None):
+        return self._event.get(key, default)
+
     def __setitem__(self, key, value):
+        if self._shared:
+            # copy on write, see cow_copy()
+            self._event = dict(self._event)
+            self._shared = False
         self._event[key] = value
 
     def __iter__(self):
         return self._event.__iter__()
 
+    def cow_copy(self) -> 'Event':
+        """
+        Copy which shares the event data with this event until one of them sets a field.
+        Nested values like persons stay shared, replace them instead of modifying them in place.
+        """
+        event = object.__new__(type(self))
+        event._event = self._event
+        event.start = self.start
+        event.duration = self.duration
+        event.origin = self.origin
+        event._shared = self._shared = True
+        return event
+
     def __len__(self):
         return len(self._event)
 
@@ -231,4 +269,4 @@ class Event[T = dict[str, Any]](Mapping):
 
     def export(self, prefix, suffix=""):
         with open("{}{}{}.json".format(prefix, self["guid"], suffix), "w") as fp:
-            json.dump(self._event, fp, indent=2)
+            dump_json(self._event, fp)
@@ -0,0 +1,89 @@
+"""
+Writes the separate events/<guid>.json files, which give better git diffs than one big schedule.json
+
+Only files whose content changed are rewritten (atomically), and only files of events which are
+not exported any more are deleted – so an unchanged event causes neither a write nor git index churn.
+Like the former `git rm events/*`, every json file in the directory which was not exported is stale.
+
+    with EventFiles('events') as files:
+        fahrplan.foreach_event(lambda e: files.write_event(e, '-origin'))
+        everything.foreach_event(lambda e: files.write_event(e, '-hub'))
+"""
+import os
+import json
+import threading
+
+try:
+    from . import publish
+    from .event import Event
+    from .tools import dumps_json
+except ImportError:
+    import publish
+    from event import Event
+    from tools import dumps_json
+
+
+class EventFiles:
+    def __init__(self, directory='events', clean=True):
+        """clean: delete the stale files after the export, not wanted e.g. for local runs without --git"""
+        self.directory = directory
+        self.clean = clean
+        os.makedirs(directory, exist_ok=True)
+        # names of the files written or confirmed as unchanged in this run
+        self.exported = set()
+        self.written = 0
+        self.removed = 0
+
+    def write(self, name: str, data: dict, cls=json.JSONEncoder) -> bool:
+        """writes data to <directory>/<name>.json, unless the file already has the same content. Returns True if written."""
+        file = os.path.join(self.directory, f'{name}.json')
+        content = dumps_json(data, cls=cls).encode('utf-8')
+        self.exported.add(f'{name}.json')
+
+        try:
+            # cheap size check first, most unchanged files are then compared without reading them twice
+            if os.path.getsize(file) == len(content):
+                with open(file, 'rb') as fp:
+                    if fp.read() == content:
+                        return False
+        except OSError:
+            pass
+
+        tmp = f'{file}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp, 'wb') as fp:
+            fp.write(content)
+        os.replace(tmp, file)
+        publish.wrote(file)
+        self.written += 1
+        return True
+
+    def write_event(self, event: Event | dict, suffix='') -> bool:
+        """same content as Event.export(), as <guid><suffix>.json"""
+        data = event._event if isinstance(event, Event) else event
+        return self.write(f"{event['guid']}{suffix}", data)
+
+    def remove_stale(self) -> list[str]:
+        """deletes the json files of the directory which were not exported since this writer was created"""
+        stale = sorted(
+            entry.name for entry in os.scandir(self.directory)
+            if entry.name.endswith('.json') and entry.name not in self.exported
+        )
+        for name in stale:
+            os.remove(os.path.join(self.directory, name))
+            publish.removed(os.path.join(self.directory, name))
+        self.removed += len(stale)
+        return stale
+
+    def __str__(self):
+        return f'{len(self.exported)} event files, {self.written} written, {self.removed} removed'
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # after a failed export we can not tell which files are stale
+        if exc_type is not None:
+            return
+        if self.clean:
+            self.remove_stale()
+        print(f'  {self}')
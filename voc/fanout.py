@@ -0,0 +1,93 @@
+"""
+Builds several derived schedules (e.g. the himmel variants) from one pass over a source schedule
+
+    himmel, himmel2 = fan_out(fahrplan, [
+        Variant("Himmel", rooms={"One": Rooms.S1}, namespace=f"{xc3}-himmel-evac", filter=lambda e: not e['do_not_record']),
+        Variant("Himmel Door", rooms={"One": Rooms.S1_door}, namespace=f"{xc3}-himmel-door"),
+    ])
+    export_all({"himmel": himmel, "himmel2": himmel2})
+"""
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable
+
+try:
+    from .event import Event
+    from .room import Room
+    from .schedule import Schedule, ScheduleStats
+    from .tools import gen_uuid
+except ImportError:
+    from event import Event
+    from room import Room
+    from schedule import Schedule, ScheduleStats
+    from tools import gen_uuid
+
+
+@dataclass
+class Variant:
+    # appended to the conference title, like Schedule.copy(name)
+    name: str
+    # old room name or guid → new room name or Room, like Schedule.rename_rooms()
+    rooms: dict[str, str | Room] = field(default_factory=dict)
+    # if set, every event gets the new guid gen_uuid(f"{namespace}-{guid}")
+    namespace: str | None = None
+    # called with the event of the source schedule, events for which it returns False are left out
+    filter: Callable[[Event], bool] | None = None
+
+
+def fan_out(source: Schedule, variants: list[Variant]) -> list[Schedule]:
+    """
+    Derives one schedule per variant while traversing the source events only once.
+    Events are copy-on-write copies (see Event.cow_copy), only room and guid are set on them.
+    """
+    schedules = []
+    for variant in variants:
+        schedule = source.copy(variant.name, rooms=lambda room: False)
+        schedule.rename_rooms(variant.rooms)
+        schedule._stats = ScheduleStats()
+        schedules.append(schedule)
+
+    # day room name → new name per variant
+    room_names = [
+        {old: new if isinstance(new, str) else new.name for old, new in variant.rooms.items()}
+        for variant in variants
+    ]
+
+    for day_position, day in enumerate(source.days()):
+        for room, events in day["rooms"].items():
+            # (new room name if renamed, event list of the room in the derived day, stats) per variant
+            targets = []
+            for schedule, names in zip(schedules, room_names):
+                new_room = names.get(room, room)
+                target = schedule.days()[day_position]["rooms"].setdefault(new_room, [])
+                targets.append((new_room if new_room != room else None, target, schedule._stats))
+
+            for event in source._hydrated(events):
+                for variant, (new_room, target, stats) in zip(variants, targets):
+                    if variant.filter and not variant.filter(event):
+                        continue
+
+                    derived = event.cow_copy()
+                    if new_room:
+                        derived["room"] = new_room
+                    if variant.namespace:
+                        derived["guid"] = gen_uuid(f"{variant.namespace}-{event['guid']}")
+                    target.append(derived)
+                    stats.add(derived, day["index"], new_room or room)
+
+    for schedule in schedules:
+        schedule._invalidate_indexes()
+
+    return schedules
+
+
+def export_all(schedules: dict[str, Schedule], workers: int | None = None, **kwargs):
+    """
+    Exports and validates the schedules in parallel, see Schedule.export() for kwargs.
+    The keys are the export prefixes, e.g. {"himmel": himmel_schedule}.
+    """
+    with ThreadPoolExecutor(max_workers=workers or len(schedules) or 1) as pool:
+        futures = [pool.submit(schedule.export, prefix, **kwargs) for prefix, schedule in schedules.items()]
+        # re-raises the first exception of an export
+        for future in futures:
+            future.result()
@@ -1,3 +1,8 @@
+import time
+import threading
+from concurrent.futures import Future, TimeoutError
+from typing import Callable, Iterable, Iterator
+
 from voc.event import EventSourceInterface
 
 try:
@@ -29,3 +34,55 @@ class GenericConference(dict, EventSourceInterface):
             raise ScheduleException('  has no schedule url yet – ignoring')
 
         return Schedule.from_url(self.schedule_url, timeout=self.timeout, headers=self.headers)
+
+
+def fetch_schedules(
+    sources: Iterable,
+    *args,
+    fetch: Callable | None = None,
+    timeout: float = 30,
+    total_timeout: float = 120,
+) -> Iterator[tuple[object, Callable[[], Schedule]]]:
+    """
+    Downloads the schedules of all sources in parallel, but hands them out in the configured order,
+    so merging them stays deterministic:
+
+        for entry, schedule in fetch_schedules(subconferences, base_schedule):
+            schedule()  # returns the Schedule or raises the error of this source
+
+    `fetch` defaults to `source.schedule(*args)`. All downloads start right away. schedule() waits at most
+    `timeout` seconds for its source, and the whole stage – including the time the caller spends between
+    the sources – ends `total_timeout` seconds after the start. Sources missing a deadline raise a
+    ScheduleException. Their download is abandoned on a daemon thread, which does not keep the process alive.
+    """
+    sources = list(sources)
+    fetch = fetch or (lambda source: source.schedule(*args))
+    total_deadline = time.monotonic() + total_timeout
+
+    def run(source, future: Future):
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(fetch(source))
+        except BaseException as e:
+            future.set_exception(e)
+
+    futures = []
+    for i, source in enumerate(sources):
+        future = Future()
+        # not a ThreadPoolExecutor, as its workers are joined at interpreter exit even if a download hangs
+        threading.Thread(target=run, args=(source, future), name=f'fetch_schedules_{i}', daemon=True).start()
+        futures.append((source, future))
+
+    for source, future in futures:
+        def result(future=future):
+            now = time.monotonic()
+            try:
+                return future.result(timeout=max(min(now + timeout, total_deadline) - now, 0))
+            except TimeoutError:
+                future.cancel()
+                if time.monotonic() >= total_deadline:
+                    raise ScheduleException(f'  total deadline of {total_timeout}s for all sources exceeded – ignoring')
+                raise ScheduleException(f'  no schedule within {timeout}s – ignoring')
+
+        yield source, result
@@ -1,50 +1,37 @@
 
 import argparse
-import json
-import os
-import importlib.util
 
 from voc.c3data import C3data
 from voc.event import Event
+from voc.eventfiles import EventFiles
 from voc.schedule import Schedule, ScheduleEncoder
 from voc.tools import (
     commit_changes_if_something_relevant_changed,
-    git,
 )
 
-# Import GitPython's git module explicitly to avoid conflict with this file
-spec = importlib.util.find_spec("git")
-git_module = importlib.util.module_from_spec(spec)
-spec.loader.exec_module(git_module)
-Repo = git_module.Repo
 
-def export_event_files(schedule: Schedule, options: argparse.Namespace, local = False):
-    # to get proper a state, we first have to remove all event files from the previous run
-    if not local or options.git:
-        git("rm events/*  >/dev/null")
-    os.makedirs('events', exist_ok=True)
-
-    # write separate file for each event, to get better git diffs
-    # TODO: use Event.export()
-    def export_event(event: Event):
-        origin_system = None
-        if isinstance(event, Event) and event.origin:
-            origin_system = event.origin.origin_system
-
-        with open("events/{}.json".format(event["guid"]), "w") as fp:
-            json.dump(
+def export_event_files(schedule: Schedule, options: argparse.Namespace = None, local = False):
+    """
+    Writes a separate file for each event, to get better git diffs.
+    Only changed files are rewritten, and files of removed events are deleted unless
+    running locally without --git, see EventFiles.
+    """
+    with EventFiles('events', clean=not local or (options and options.git)) as files:
+        for event in schedule.events():
+            origin_system = None
+            if isinstance(event, Event) and event.origin:
+                origin_system = event.origin.origin_system
+
+            files.write(
+                event["guid"],
                 {
                     **event,
                     "room_id": schedule._room_ids.get(event["room"], None),
                     "origin": origin_system or None,
                 },
-                fp,
-                indent=2,
                 cls=ScheduleEncoder,
             )
 
-    schedule.foreach_event(export_event)
-
 
 def postprocessing(schedule: Schedule, options: argparse.Namespace, local = False, targets = []):
     if not local or options.git:
@@ -56,4 +43,4 @@ def postprocessing(schedule: Schedule, options: argparse.Namespace, local = Fals
         print("\n== Updating c3data via API…")
 
         c3data = C3data(schedule)
-        c3data.process_changed_events(Repo('.'), options)
\ No newline at end of file
+        c3data.sync(schedule, options)
\ No newline at end of file
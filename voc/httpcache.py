@@ -0,0 +1,144 @@
+"""
+On-disk cache for HTTP GET requests of schedule sources
+
+Every cached url is stored as body plus a small metadata file with the ETag/Last-Modified
+validators of the response. Following requests are sent as conditional requests, so unchanged
+documents are answered with a 304 and the cached body is reused instead of downloading it again.
+
+    VOC_HTTP_CACHE      cache directory, default ~/.cache/voc-schedule/http, empty disables the cache
+    VOC_HTTP_MAX_AGE    seconds a cached response is reused without asking the server at all
+    VOC_HTTP_OFFLINE    if set, only the cache is used and nothing is requested
+"""
+import os
+import json
+import time
+import hashlib
+import threading
+from os import path
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+try:
+    from . import session
+    from .logger import Logger
+except ImportError:
+    import session
+    from logger import Logger
+
+
+log = Logger(__name__)
+
+cache_dir = os.getenv('VOC_HTTP_CACHE', path.join(os.getenv('XDG_CACHE_HOME', '~/.cache'), 'voc-schedule', 'http'))
+max_age: float = float(os.getenv('VOC_HTTP_MAX_AGE') or 0)
+offline: bool = bool(os.getenv('VOC_HTTP_OFFLINE'))
+
+# response headers kept in the cache, everything else is not needed to reconstruct a response
+_stored_headers = ['Content-Type', 'ETag', 'Last-Modified']
+
+
+class CacheMiss(requests.exceptions.RequestException):
+    pass
+
+
+def configure(directory: str | None = None, max_age: float | None = None, offline: bool | None = None):
+    """overrides the defaults from the environment, e.g. `configure(offline=True)` to run from cache alone"""
+    settings = {'cache_dir': directory, 'max_age': max_age, 'offline': offline}
+    globals().update({k: v for k, v in settings.items() if v is not None})
+
+
+def _files(url: str) -> tuple[str, str]:
+    key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+    base = path.join(path.expanduser(cache_dir), key[:2], key)
+    return base + '.json', base + '.body'
+
+
+def _load(url: str) -> tuple[dict, bytes] | None:
+    meta_file, body_file = _files(url)
+    try:
+        with open(meta_file, 'r') as fp:
+            meta = json.load(fp)
+        with open(body_file, 'rb') as fp:
+            return meta, fp.read()
+    except (OSError, ValueError):
+        return None
+
+
+def _atomic_write(file: str, data: bytes):
+    # sources are fetched in parallel, so never leave a half written file behind
+    tmp = f'{file}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(tmp, 'wb') as fp:
+        fp.write(data)
+    os.replace(tmp, file)
+
+
+def _store(url: str, r: requests.Response):
+    meta_file, body_file = _files(url)
+    meta = {
+        'url': url,
+        'fetched': time.time(),
+        'encoding': r.encoding,
+        'headers': {k: r.headers[k] for k in _stored_headers if k in r.headers},
+    }
+    try:
+        os.makedirs(path.dirname(meta_file), exist_ok=True)
+        _atomic_write(body_file, r.content)
+        _atomic_write(meta_file, json.dumps(meta).encode('utf-8'))
+    except OSError as e:
+        log.warning(f'could not write http cache for {url}: {e}')
+
+
+def _touch(url: str, meta: dict):
+    meta_file, _ = _files(url)
+    try:
+        _atomic_write(meta_file, json.dumps({**meta, 'fetched': time.time()}).encode('utf-8'))
+    except OSError:
+        pass
+
+
+def _response(url: str, meta: dict, body: bytes) -> requests.Response:
+    r = requests.Response()
+    r.url = url
+    r.status_code = 200
+    r.reason = 'OK'
+    r._content = body
+    r.encoding = meta.get('encoding')
+    r.headers = CaseInsensitiveDict(meta.get('headers', {}))
+    r.from_cache = True
+    return r
+
+
+def get(url: str, timeout=10, headers={}, **kwargs) -> requests.Response:
+    """
+    drop-in replacement for `requests.get()`, which answers from the cache if the document did not change
+    """
+    if not cache_dir:
+        return session.get(url, timeout=timeout, headers=headers, **kwargs)
+
+    cached = _load(url)
+    if cached:
+        meta, body = cached
+        if offline or (max_age and time.time() - meta.get('fetched', 0) < max_age):
+            log.debug(f'using cached {url}')
+            return _response(url, meta, body)
+    elif offline:
+        raise CacheMiss(f'{url} is not cached, but offline mode is enabled')
+
+    conditional_headers = dict(headers)
+    if cached:
+        if 'ETag' in meta['headers']:
+            conditional_headers['If-None-Match'] = meta['headers']['ETag']
+        if 'Last-Modified' in meta['headers']:
+            conditional_headers['If-Modified-Since'] = meta['headers']['Last-Modified']
+
+    r = session.get(url, timeout=timeout, headers=conditional_headers, **kwargs)
+
+    if r.status_code == 304 and cached:
+        log.debug(f'{url} not modified, using cached body')
+        _touch(url, meta)
+        return _response(url, meta, body)
+
+    r.from_cache = False
+    if r.status_code == 200:
+        _store(url, r)
+    return r
@@ -0,0 +1,127 @@
+"""
+Local record of what was pushed to which target system (c3data, voctoimport, hub)
+
+For every target and event the content hash of the last successful push is stored in a SQLite
+database, by default one per output directory below ~/.local/state/voc-schedule/ledger – outside of
+the published files. A push then only sends events which changed since,
+and deletes the ones which are gone – independent of the git history or skipped runs. As every
+push is recorded right away, an interrupted run continues where it stopped.
+
+    ledger = Ledger()
+    pending = ledger.pending('c3data', schedule.events())
+    for event, hash in pending.upserts:
+        push(event)
+        ledger.mark_pushed('c3data', [(event['guid'], hash)])
+"""
+import os
+import re
+import json
+import time
+import sqlite3
+from dataclasses import dataclass, field
+from os import path
+from typing import Iterable
+
+try:
+    from .diff import content_id
+    from .logger import Logger
+except ImportError:
+    from diff import content_id
+    from logger import Logger
+
+
+log = Logger(__name__)
+
+# if not set, default_file() is used
+ledger_file = os.getenv('VOC_SYNC_LEDGER')
+state_dir = path.join(os.getenv('XDG_STATE_HOME', '~/.local/state'), 'voc-schedule', 'ledger')
+
+
+def default_file() -> str:
+    """one ledger per output directory (the working directory of the scripts), but not inside of it"""
+    name = re.sub(r'[^A-Za-z0-9._-]+', '_', os.getcwd().strip(os.sep)) or 'root'
+    return path.join(path.expanduser(state_dir), f'{name}.sqlite')
+
+
+def digest(event) -> str:
+    """content hash of an event, independent of key order"""
+    return content_id(json.dumps(dict(event), sort_keys=True, default=str))
+
+
+@dataclass
+class Pending:
+    # (event, content hash) of new events and events which changed since their last push
+    upserts: list[tuple[dict, str]] = field(default_factory=list)
+    # guids of pushed events, which are not in the schedule any more
+    removed: list[str] = field(default_factory=list)
+    # number of events which are the same as pushed
+    unchanged: int = 0
+
+    def __bool__(self):
+        return bool(self.upserts or self.removed)
+
+    def __str__(self):
+        return f"{len(self.upserts)} to upsert, {len(self.removed)} to remove"
+
+
+class Ledger:
+    def __init__(self, file: str | None = None):
+        self.file = file or ledger_file or default_file()
+        os.makedirs(path.dirname(path.abspath(self.file)), exist_ok=True)
+        self.db = sqlite3.connect(self.file)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('''
+            CREATE TABLE IF NOT EXISTS pushed (
+                target TEXT NOT NULL,
+                guid TEXT NOT NULL,
+                hash TEXT NOT NULL,
+                time REAL NOT NULL,
+                PRIMARY KEY (target, guid)
+            )
+        ''')
+        self.db.commit()
+
+    def hashes(self, target: str) -> dict[str, str]:
+        return dict(self.db.execute('SELECT guid, hash FROM pushed WHERE target = ?', (target,)))
+
+    def pending(self, target: str, events: Iterable[dict], complete=True) -> Pending:
+        """
+        Compares the events with the last pushed state of target.
+        Set complete=False if events is only a part of the schedule, then nothing is reported as removed.
+        """
+        pushed = self.hashes(target)
+        empty = not pushed
+        result = Pending()
+        for event in events:
+            hash = digest(event)
+            if pushed.pop(event['guid'], None) != hash:
+                result.upserts.append((event, hash))
+            else:
+                result.unchanged += 1
+
+        if empty and result.upserts:
+            log.warning(f"  nothing recorded for {target} in {self.file} yet, pushing all {len(result.upserts)} events")
+        if complete:
+            result.removed = list(pushed)
+        return result
+
+    def mark_pushed(self, target: str, items: Iterable[tuple[str, str]]):
+        """records (guid, content hash) pairs as successfully pushed to target"""
+        now = time.time()
+        with self.db:
+            self.db.executemany(
+                'INSERT OR REPLACE INTO pushed (target, guid, hash, time) VALUES (?, ?, ?, ?)',
+                ((target, guid, hash, now) for guid, hash in items)
+            )
+
+    def mark_removed(self, target: str, guids: Iterable[str]):
+        with self.db:
+            self.db.executemany('DELETE FROM pushed WHERE target = ? AND guid = ?', ((target, guid) for guid in guids))
+
+    def forget(self, target: str):
+        """drops everything recorded for target, so the next push sends all events again"""
+        with self.db:
+            self.db.execute('DELETE FROM pushed WHERE target = ?', (target,))
+
+    def close(self):
+        self.db.close()
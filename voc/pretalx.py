@@ -1,8 +1,7 @@
 from os import path, getenv
-import requests
 from urllib.parse import urlparse
 
-from voc import GenericConference, logger
+from voc import GenericConference, httpcache, logger
 
 token = getenv('PRETALX_TOKEN', '')
 headers = {'Authorization': 'Token ' + token, 'Content-Type': 'application/json'}
@@ -48,20 +47,20 @@ class PretalxConference(GenericConference):
                 pass
 
     def meta(self):
-        return requests.get(self.api_url, timeout=self.timeout, headers=self.headers) \
+        return httpcache.get(self.api_url, timeout=self.timeout, headers=self.headers) \
             .json()
 
     def rooms(self):
-        return requests.get(self.api_url + '/rooms', timeout=self.timeout, headers=self.headers) \
+        return httpcache.get(self.api_url + '/rooms', timeout=self.timeout, headers=self.headers) \
             .json() \
             .get('results')
 
     def latest_schedule(self):
-        return requests.get(self.api_url + '/schedules/latest/', timeout=self.timeout, headers=self.headers) \
+        return httpcache.get(self.api_url + '/schedules/latest/', timeout=self.timeout, headers=self.headers) \
             .json()
         # Custom pretalx schedule format
 
     # def tracks(self):
-    #    return requests.get(self.api_url + '/tracks', timeout=1, headers=headers) if self.origin_system == 'pretalx.c3voc.de' else {} \
+    #    return httpcache.get(self.api_url + '/tracks', timeout=1, headers=headers) if self.origin_system == 'pretalx.c3voc.de' else {} \
     #        .json() \
     #        .get('results')
@@ -0,0 +1,168 @@
+"""
+Commits and pushes exported files in-process via GitPython, instead of spawning git for every step
+
+Exports report the files they write or delete (Schedule.export(), EventFiles, open_json()), and whether
+they changed by more than their version: a schedule.json by its structural diff (see Schedule.changes()),
+an event file whenever it is rewritten. Publishing stages exactly those files, without a scan of the
+working tree, and only if one of them changed relevantly:
+
+    schedule.export('everything')
+    if publish.relevant():
+        publish.commit(f"version {schedule.version()}")
+"""
+import os
+import json
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+try:
+    from .logger import Logger
+except ImportError:
+    from logger import Logger
+
+
+log = Logger(__name__)
+
+# absolute paths of the files written by exports since the last commit() or revert(),
+# with whether they changed by more than their version
+written: dict[str, bool] = {}
+# absolute paths of the files deleted by exports since the last commit() or revert()
+deleted: set[str] = set()
+
+
+def wrote(*files: str, changed=True):
+    """reports written files, changed=False for files whose content only follows others, e.g. the xml of a schedule.json"""
+    for file in files:
+        file = os.path.abspath(file)
+        written[file] = written.get(file, False) or changed
+        deleted.discard(file)
+
+
+def removed(*files: str):
+    for file in files:
+        file = os.path.abspath(file)
+        deleted.add(file)
+        written.pop(file, None)
+
+
+def relevant() -> bool:
+    """whether any reported file was deleted or changed by more than its version"""
+    return bool(deleted) or any(written.values())
+
+
+def _without_versions(data):
+    if isinstance(data, dict):
+        return {key: _without_versions(value) for key, value in data.items() if key != 'version'}
+    if isinstance(data, list):
+        return [_without_versions(value) for value in data]
+    return data
+
+
+def _load_json(file):
+    try:
+        with open(file) as fp:
+            return json.load(fp)
+    except (OSError, ValueError):
+        return None
+
+
+@contextmanager
+def open_json(file: str):
+    """
+    open(file, 'w') for json files scripts write directly, e.g. meta.json.
+    The file is reported as changed if its data differs from before by more than "version" fields.
+    """
+    previous = _load_json(file)
+    with open(file, 'w') as fp:
+        yield fp
+    wrote(file, changed=previous is None or _without_versions(previous) != _without_versions(_load_json(file)))
+
+
+@dataclass
+class PublishReport:
+    commit: str | None = None
+    staged: int = 0
+    removed: int = 0
+    # seconds per step, e.g. {'stage': 0.02, 'commit': 0.01, 'push': 0.4}
+    timings: dict[str, float] = field(default_factory=dict)
+
+    def __str__(self):
+        steps = ', '.join(f'{step} {seconds:.2f}s' for step, seconds in self.timings.items())
+        return f'{self.commit or "nothing"} committed, {self.staged} files staged, {self.removed} removed ' \
+            f'in {sum(self.timings.values()):.2f}s ({steps})'
+
+
+def _repo(directory='.'):
+    # imported here, so exports work without GitPython or a git checkout
+    from git import GitCmdObjectDB, Repo
+    from gitdb.db import LooseObjectDB
+
+    class ObjectDB(GitCmdObjectDB):
+        # GitCmdObjectDB runs `git hash-object` for every blob, loose objects are written in-process.
+        # Reading still uses the one persistent `git cat-file` of GitPython.
+        store = LooseObjectDB.store
+
+    return Repo(directory, search_parent_directories=True, odbt=ObjectDB)
+
+
+def _reported(repo) -> tuple[list[str], list[str]]:
+    """reported files inside of the working tree, as paths relative to it"""
+    root = repo.working_tree_dir
+
+    def relative(files):
+        paths = (os.path.relpath(f, root) for f in files)
+        return sorted(p for p in paths if not p.startswith(os.pardir + os.sep))
+
+    return relative(f for f in written if os.path.isfile(f)), relative(deleted)
+
+
+def commit(message: str, push=True, directory='.') -> PublishReport:
+    """
+    Stages exactly the reported files, commits them and pushes the current branch.
+    Besides the push, which GitPython leaves to git, only the persistent `git cat-file` reader is started.
+    """
+    from git import Commit
+
+    report = PublishReport()
+    repo = _repo(directory)
+    # Repo.index creates a new IndexFile on every access
+    index = repo.index
+
+    start = time.perf_counter()
+    files, deletions = _reported(repo)
+    if files:
+        index.add(files, write=False)
+    for file in deletions:
+        # IndexFile.remove() would run `git rm --cached`
+        if index.entries.pop((file, 0), None):
+            report.removed += 1
+    index.write()
+    report.staged = len(files)
+    report.timings['stage'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    tree = index.write_tree()
+    parents = [repo.head.commit] if repo.head.is_valid() else []
+    if parents and tree.binsha == parents[0].tree.binsha:
+        log.info('exported files are the same as in the last commit')
+    else:
+        report.commit = Commit.create_from_tree(repo, tree, message, parent_commits=parents, head=True).hexsha[:7]
+    report.timings['commit'] = time.perf_counter() - start
+
+    if push and report.commit:
+        start = time.perf_counter()
+        repo.remote().push().raise_if_error()
+        report.timings['push'] = time.perf_counter() - start
+
+    written.clear()
+    deleted.clear()
+    print(f'  {report}')
+    return report
+
+
+def revert(directory='.'):
+    """discards all changes of the working tree and index, like `git reset --hard`"""
+    _repo(directory).head.reset(index=True, working_tree=True)
+    written.clear()
+    deleted.clear()
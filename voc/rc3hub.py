@@ -1,10 +1,14 @@
 from os import getenv
-import json
-import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
 
 try:
+    from . import session
+    from .ledger import Ledger
     from .schedule import Schedule
 except ImportError:
+    import session
+    from ledger import Ledger
     from schedule import Schedule
 
 url = getenv('HUB_URL', 'https://api-test.rc3.cccv.de/api/c/rc3/')
@@ -15,30 +19,36 @@ headers = {
     'Accept': 'application/json'
 }
 
+# number of events posted in parallel, the shared session allows at most session.max_per_host of them per host
+concurrency = 4
+
 
 def get(path):
     print('GET ' + url + path)
-    r = requests.get(url + path, headers=headers)
+    r = session.get(url + path, headers=headers)
     print(r.status_code)
     return r.json()
 
 
 def post_event(event):
-    print('POST {}event/{}/schedule'.format(url, event['guid']))
-    r = requests.post(
+    r = session.post(
         '{}event/{}/schedule'.format(url, event['guid']),
-        json=event, 
+        json=event,
         headers=headers
     )
-    print(r.status_code)
 
     if r.status_code != 201:
-        print(json.dumps(event, indent=2))
-        raise Exception(r.json()['error'])
+        try:
+            error = r.json()['error']
+        except Exception:
+            error = f'{r.status_code} {r.reason}'
+        raise Exception(error)
     return r
 
 
 def upsert_event(event):
+    # the fixes below must not change the event of the schedule
+    event = dict(event)
     if event['track']:
         if not(event['track'] in tracks):
             print('WARNING: Track {} does not exist'.format(event['track']))
@@ -53,70 +63,140 @@ def upsert_event(event):
 
 def depublish_event(event_guid):
     post_event({
-        'guid': event_guid.event,
+        'guid': event_guid,
         'public': False
     })
 
 
-skip = False
-tracks = []
-
-
-def init(channels):
-    global tracks
-
-    tracks = {x['name']: x['id'] for x in get('tracks')}
+tracks = {}
+# set by init()
+hub: 'Hub | None' = None
+
+
+@dataclass
+class PushReport:
+    pushed: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+    # guid → reason, e.g. unknown room
+    skipped: dict[str, str] = field(default_factory=dict)
+    # guid → error message of the hub
+    failed: dict[str, str] = field(default_factory=dict)
+    # events which did not change since their last push
+    unchanged: int = 0
+
+    def __str__(self):
+        return f'{len(self.pushed)} pushed, {len(self.removed)} removed, {self.unchanged} unchanged, ' \
+            f'{len(self.skipped)} skipped, {len(self.failed)} failed'
+
+    def print(self):
+        print(f'  {self}')
+        for guid, reason in self.skipped.items():
+            print(f'   skipped {guid}: {reason}')
+        for guid, error in self.failed.items():
+            print(f'   failed {guid}: {error}')
+
+
+class Hub:
+    """pushes schedules to the hub, with tracks and rooms looked up once when created"""
+
+    def __init__(self, channels=[]):
+        self.tracks = {x['name']: x['id'] for x in get('tracks')}
+        self.room_ids = {x['name']: x['id'] for x in get('rooms')}
+        self.channel_room_ids = {x['schedule_room']: x['room_guid'] for x in channels}
+        # tracks already warned about
+        self.unknown_tracks = set()
+
+    def event_data(self, event) -> dict:
+        """hub representation of an event, raises ValueError if it can not be pushed"""
+        data = dict(event)
+
+        if data['room'] in self.channel_room_ids:
+            data['room_id'] = self.channel_room_ids[data['room']]
+            del data['room']
+        elif data['room'] not in self.room_ids:
+            raise ValueError('Room {} does not exist'.format(data['room']))
+
+        if data.get('track') and data['track'] not in self.tracks:
+            if data['track'] not in self.unknown_tracks:
+                print('WARNING: Track {} does not exist'.format(data['track']))
+                self.unknown_tracks.add(data['track'])
+            data['track'] = None
+
+        # Workaround for bug in hub: remove empty room_id from dict
+        if 'room_id' in data and not(data['room_id']) and 'room' in data:
+            del data['room_id']
+
+        return data
+
+    def push(self, schedule: Schedule, ledger: Ledger) -> PushReport:
+        """
+        Posts the events which changed since the last push recorded in the ledger with up to `concurrency` requests in parallel,
+        and depublishes removed events. Every result is recorded immediately, so an interrupted push resumes where it stopped.
+        """
+        target = f'hub/{url}'
+        pending = ledger.pending(target, schedule.events())
+        report = PushReport(unchanged=pending.unchanged)
+        print(f'  {pending}')
+
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            futures = {}
+            for event, hash in pending.upserts:
+                try:
+                    futures[pool.submit(post_event, self.event_data(event))] = (event['guid'], hash)
+                except ValueError as e:
+                    report.skipped[event['guid']] = str(e)
+            for guid in pending.removed:
+                futures[pool.submit(depublish_event, guid)] = (guid, None)
+
+            try:
+                # the ledger is only used from this thread
+                for future in as_completed(futures):
+                    guid, hash = futures[future]
+                    try:
+                        future.result()
+                    except Exception as e:
+                        report.failed[guid] = str(e)
+                        continue
 
+                    if hash is None:
+                        ledger.mark_removed(target, [guid])
+                        report.removed.append(guid)
+                    else:
+                        ledger.mark_pushed(target, [(guid, hash)])
+                        report.pushed.append(guid)
+            except KeyboardInterrupt:
+                print('\n  interrupted, finishing running requests – the next push continues from here')
+                for future in futures:
+                    future.cancel()
 
-def push_schedule(schedule):
-    channel_room_ids = {x['schedule_room']: x['room_guid'] for x in channels}
-    rooms = get('rooms')
-    room_ids = {x['name']: x['id'] for x in rooms}
-    hub_room_names = {x['id']: x['name'] for x in rooms}
+        return report
 
-    print(tracks)
 
-    def process(event):
-        global skip
-        if skip:
-            if event['guid'] == skip:
-                skip = False
-            return
+def init(channels):
+    global tracks, hub
 
-        try: 
-            if event['room'] in channel_room_ids:
-                event['room_id'] = channel_room_ids.get(event['room'])
-                del event['room']
-            elif not(event['room'] in room_ids):
-                if event['room'] in channel_room_ids:
-                    try:
-                        event['room'] = hub_room_names[channel_room_ids[event['room']]]
-                    except Exception as e:
-                        print(json.dumps(event, indent=2))
-                        print(e.message)
-                else:
-                    print('ERROR: Room {} does not exist'.format(event['room']))
-                    return
-            upsert_event(event)
+    hub = Hub(channels)
+    tracks = hub.tracks
 
-        except Exception as e:
-            print(json.dumps(event, indent=2))
-            print(event['guid'])
-            print(e)
 
-    schedule.foreach_event(process)
+def push_schedule(schedule, ledger: Ledger | None = None) -> PushReport:
+    """pushes the events which changed since their last successful push, recorded in the ledger"""
+    report = hub.push(schedule, ledger or Ledger())
+    report.print()
+    return report
 
 
 if __name__ == '__main__':
     import optparse
     parser = optparse.OptionParser()
-    # , doc="Skips all events till event with guid X is found.")
-    parser.add_option('--skip', action="store", dest="skip", default=False)
+    parser.add_option('--ledger', action="store", dest="ledger", default=None,
+                      help="sqlite file with the state of previous pushes, default see voc/ledger.py")
+    parser.add_option('--concurrency', action="store", dest="concurrency", type="int", default=concurrency)
 
     options, args = parser.parse_args()
-    skip = options.skip
+    concurrency = options.concurrency
 
-    channels = requests \
+    channels = session \
         .get('https://c3voc.de/wiki/lib/exe/graphql2.php?query={channels{nodes{schedule_room,room_guid}}}') \
         .json()['data']['channels']['nodes']
 
@@ -125,6 +205,6 @@ if __name__ == '__main__':
     schedule = Schedule.from_url('https://data.c3voc.de/rC3/everything.schedule.json')
     # schedule = Schedule.from_url('https://data.c3voc.de/rC3/channels.schedule.json')
     # schedule = Schedule.from_file('rC3/channels.schedule.json')
-    
-    push_schedule(schedule)
+
+    push_schedule(schedule, Ledger(options.ledger))
     print('done')
@@ -7,7 +7,7 @@ except:
     from event import Schedule
     from tools import gen_uuid, normalise_string
 
-@dataclass
+@dataclass(slots=True)
 class Room:
     guid: str = None
     name: str = None
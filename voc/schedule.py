@@ -1,16 +1,13 @@
 # -*- coding: utf-8 -*-
-from dataclasses import dataclass
-import sys
-import os
+from dataclasses import dataclass, field, replace
 import re
 import json
 import copy
-import requests
 import pytz
-import dateutil.parser
-from collections import OrderedDict
-from typing import Callable, Dict, List, Union
+from collections import Counter, OrderedDict
+from typing import Callable, Dict, Iterator, List, Union
 from datetime import datetime, timedelta
+from os import path
 from urllib.parse import urlparse
 
 # if lxml is available, try to use it, otherwise fall back to the built in xml parser
@@ -21,27 +18,34 @@ except ImportError:
 
 try:
     import voc.tools as tools
+    import voc.validation as validation
+    import voc.httpcache as httpcache
+    import voc.publish as publish
+    from .diff import ScheduleDiff, content_id, diff
     from .event import Event, EventSourceInterface
     from .room import Room
     from .logger import Logger
+    from .timestamps import parse_datetime
+    from .timeline import ConflictReport, Timeline
 except ImportError:
     import tools
+    import validation
+    import httpcache
+    import publish
+    from diff import ScheduleDiff, content_id, diff
     from event import Event, EventSourceInterface
     from room import Room
     from logger import Logger
+    from timestamps import parse_datetime
+    from timeline import ConflictReport, Timeline
 
 
 log = Logger(__name__)
 
-# validator = f"{sys.path[0]}/validator/xsd/validate_schedule_xml.sh"
-validator = f"xmllint --noout --schema {sys.path[0]}/validator/xsd/schedule.xml.xsd"
-# validator = f"xmllint --noout --schema {sys.path[0]}/validator/xsd/schedule-without-person.xml.xsd"
-validator_filter = ""
-
 
 def set_validator_filter(filter):
-    global validator_filter
-    validator_filter += " | awk '" + " && ".join(["!/" + x + "/" for x in filter]) + "'"
+    """hide validation errors matching one of the given regular expressions"""
+    validation.set_filter(filter)
 
 
 class ScheduleException(Exception):
@@ -49,6 +53,8 @@ class ScheduleException(Exception):
 
 
 class ScheduleDay(dict):
+    __slots__ = ('start', 'end')
+
     def __init__(
         self, i=None, year=None, month=12, day=None, tz=None, dt=None, json=None
     ):
@@ -77,21 +83,88 @@ class ScheduleDay(dict):
         else:
             raise Exception("Either give JSON xor i, year, month, day")
 
-        self.start: datetime = dateutil.parser.parse(self["day_start"])
-        self.end: datetime = dateutil.parser.parse(self["day_end"])
+        self.start: datetime = parse_datetime(self["day_start"])
+        self.end: datetime = parse_datetime(self["day_end"])
 
     def json(self):
         return self
 
 @dataclass
 class ScheduleStats:
+    """Kept up to date by the Schedule methods which add or remove events, see Schedule.stats"""
     min_id: int|None = None
     max_id: int|None = None
     person_min_id: int|None = None
     person_max_id: int|None = None
-    events_count = 0
+    events_count: int = 0
     first_event: Event|None = None
     last_event: Event|None = None
+    # total duration of all events
+    minutes: int = 0
+    # events per day room name and per day index
+    rooms: Counter = field(default_factory=Counter)
+    days: Counter = field(default_factory=Counter)
+
+    @staticmethod
+    def _person_ids(event: Event) -> list[int]:
+        ids = []
+        for person in event.persons():
+            try:
+                if "id" in person and (isinstance(person["id"], int) or person["id"].isnumeric()):
+                    ids.append(int(person["id"]))
+            except Exception:
+                pass
+        return ids
+
+    def add(self, event: Event, day: int, room: str):
+        self.events_count += 1
+        self.minutes += int(event.duration.total_seconds() // 60)
+        self.rooms[room] += 1
+        self.days[day] += 1
+
+        id = int(event["id"])
+        if self.min_id is None or id < self.min_id:
+            self.min_id = id
+        if self.max_id is None or id > self.max_id:
+            self.max_id = id
+
+        if self.first_event is None or event.start < self.first_event.start:
+            self.first_event = event
+        if self.last_event is None or event.start > self.last_event.start:
+            self.last_event = event
+
+        for person_id in self._person_ids(event):
+            if self.person_min_id is None or person_id < self.person_min_id:
+                self.person_min_id = person_id
+            if self.person_max_id is None or person_id > self.person_max_id:
+                self.person_max_id = person_id
+
+    def remove(self, event: Event, day: int, room: str) -> bool:
+        """
+        Returns False if the event was one of the extremes, as the next ones are unknown without a full recalculation
+        """
+        self.events_count -= 1
+        self.minutes -= int(event.duration.total_seconds() // 60)
+        self._decrement(self.rooms, room)
+        self._decrement(self.days, day)
+
+        return event.start not in (self.first_event.start, self.last_event.start) \
+            and int(event["id"]) not in (self.min_id, self.max_id) \
+            and not set(self._person_ids(event)) & {self.person_min_id, self.person_max_id}
+
+    @staticmethod
+    def _decrement(counter: Counter, key, count=1):
+        counter[key] -= count
+        if counter[key] <= 0:
+            del counter[key]
+
+    def move_room(self, old_name: str, new_name: str, count: int):
+        self._decrement(self.rooms, old_name, count)
+        self.rooms[new_name] += count
+
+    def copy(self) -> 'ScheduleStats':
+        return replace(self, rooms=Counter(self.rooms), days=Counter(self.days))
+
 
 class Schedule(dict):
     """Schedule class with import and export methods"""
@@ -100,10 +173,19 @@ class Schedule(dict):
         self._tz = None
         self._days: list[ScheduleDay] = []
         self._room_ids = {}
+        # guid/id -> (day position, room name, event position), built lazily on first lookup
+        self._events_by_guid: dict[str, tuple[int, str, int]] | None = None
+        self._events_by_id: dict[str, dict[tuple[int, str, int], None]] | None = None
+        # field -> value -> events, built lazily by query() and dropped on every change via Schedule methods
+        self._events_by_field: dict[str, dict[str, list[Event]]] = {}
+        self._timeline: Timeline | None = None
         self.origin_url = None
         self.origin_system = None
-        self.stats: ScheduleStats
+        # calculated on first use, None after changes which can not be tracked incrementally
+        self._stats: ScheduleStats | None = None
         self.generator = None
+        # content of the schedule.json overwritten by the last export(), see changes()
+        self._previous_export: str | Schedule | None = None
 
         if json:
             dict.__init__(self, json["schedule"])
@@ -113,9 +195,7 @@ class Schedule(dict):
                 "conference": conference
             })
 
-        if "days" in self["conference"]:
-            self._generate_stats("start" not in self["conference"])
-        else:
+        if "days" not in self["conference"]:
             self["conference"]["days"] = []
 
         # when conference start is not set, use first event start
@@ -124,7 +204,7 @@ class Schedule(dict):
             self["conference"]["start"] = self.start.strftime("%Y-%m-%d")
         # when it's a string parse to datetime
         elif isinstance(self["conference"]["start"], str):
-            self.start = dateutil.parser.parse(self["conference"]["start"])
+            self.start = parse_datetime(self["conference"]["start"])
         # when it's already a datetime use it directly, but convert it string for backward compatibility
         elif isinstance(self["conference"]["start"], datetime):
             self.start = self["conference"]["start"]
@@ -136,7 +216,7 @@ class Schedule(dict):
             self["conference"]["end"] = self.end.strftime("%Y-%m-%d")
         # when it's a string parse to datetime
         elif isinstance(self["conference"]["end"], str):
-            self.end = dateutil.parser.parse(self["conference"]["end"])
+            self.end = parse_datetime(self["conference"]["end"])
         # when it's already a datetime use it directly, but convert it string for backward compatibility
         elif isinstance(self["conference"]["end"], datetime):
             self.end = self["conference"]["end"]
@@ -166,7 +246,7 @@ class Schedule(dict):
     @classmethod
     def from_url(cls, url, timeout=10, headers={}):
         log.info("Requesting " + url)
-        schedule_r = requests.get(url, timeout=timeout, headers=headers)
+        schedule_r = httpcache.get(url, timeout=timeout, headers=headers)
 
         if schedule_r.ok is False:
             schedule_r.raise_for_status()
@@ -251,7 +331,7 @@ class Schedule(dict):
 
         for day in schedule["conference"]["days"]:
             if start_hour is not None:
-                start = dateutil.parser.parse(day["day_start"]).replace(hour=start_hour)
+                start = parse_datetime(day["day_start"]).replace(hour=start_hour)
                 day["day_start"] = start.isoformat()
             day["rooms"] = []
 
@@ -261,11 +341,33 @@ class Schedule(dict):
         self.generator = tools.generator_info()
 
     # TODO: test if this method still works after refactoring of Schedule class to dict child
-    def copy(self, name=None):
-        schedule = copy.deepcopy(self)
+    def copy(self, name=None, rooms: Callable[[str], bool] | None = None):
+        """
+        Copy for derived schedules: metadata, days and room lists are copied, the events are copy-on-write
+        and share their data with this schedule until a field is set (see Event.cow_copy).
+        If rooms is given, only the day rooms whose name matches this predicate are copied.
+        """
+        def replacing(d: dict, key: str, value) -> dict:
+            # keeps the key order of the original, so the exports of a plain copy are identical
+            return {k: value if k == key else copy.deepcopy(v) for k, v in d.items()}
+
+        days = [
+            ScheduleDay(json=replacing(day, "rooms", {
+                room: [event.cow_copy() for event in self._hydrated(events)]
+                for room, events in day["rooms"].items()
+                if rooms is None or rooms(room)
+            }))
+            for day in self.days()
+        ]
+        conference = replacing(self["conference"], "days", days)
         if name:
-            schedule["conference"]["title"] += f" - {name}"
-        return Schedule(json={"schedule": schedule})
+            conference["title"] += f" - {name}"
+
+        schedule = Schedule(json={"schedule": replacing(self, "conference", conference)})
+        if rooms is None and self._stats is not None:
+            # first_event and last_event are the events of this schedule, with the same content as their copies
+            schedule._stats = self._stats.copy()
+        return schedule
 
     def version(self):
         return self["version"]
@@ -292,7 +394,7 @@ class Schedule(dict):
     """returns the conference start day as datetime object"""
     def conference_start(self):
         # TODO: why do we do we split on T here? 
-        return dateutil.parser.parse(self.conference("start").split("T")[0])
+        return parse_datetime(self.conference("start").split("T")[0])
 
     def days(self):
         # TODO return _days object list instead of raw dict/json?
@@ -339,15 +441,21 @@ class Schedule(dict):
                 elif r.get('guid'):
                     self._room_ids[new_name] = r['guid']
 
-        for day in self['conference']['days']:
+        self._invalidate_indexes()
+        for day_position, day in enumerate(self['conference']['days']):
             for room_key, events in list(day['rooms'].items()):
                 new_room = replacements.get(room_key, room_key)
                 new_name = new_room if isinstance(new_room, str) else new_room.name
 
                 day['rooms'][new_name] = day['rooms'].pop(room_key)
                 if room_key != new_name:
-                    for event in events:
+                    if self._stats is not None:
+                        self._stats.move_room(room_key, new_name, len(events))
+                    for position, event in enumerate(events):
                         event['room'] = new_name
+                        if self._events_by_guid is not None:
+                            self._unindex_event((day_position, room_key, position), event)
+                            self._index_event((day_position, new_name, position), event)
 
     def add_room(self, room: str | dict | Room, context: EventSourceInterface | None = None):
         # if rooms is str, use the old behaviour – for backwords compability
@@ -387,12 +495,20 @@ class Schedule(dict):
 
         #  log.debug('  adding room {} to day {} with {} events'.format(target_room, day, len(data)))
         target_day_rooms = self.day(day)["rooms"]
+        offset = 0
 
         if self.room_exists(day, target_room):
+            offset = len(target_day_rooms[target_room])
             target_day_rooms[target_room] += data
         else:
             target_day_rooms[target_room] = data
 
+        self._invalidate_indexes()
+        for position in range(offset, len(target_day_rooms[target_room])):
+            if self._stats is not None:
+                self._stats.add(self._hydrated_event_at((day - 1, target_room, position)), day, target_room)
+            if self._events_by_guid is not None:
+                self._index_event((day - 1, target_room, position), target_day_rooms[target_room][position])
 
     # TODO this method should work woth both room key and room guid,
     #  but currently it only works with room name
@@ -407,25 +523,214 @@ class Schedule(dict):
         if room_key in self._room_ids:
             del self._room_ids[room_key]
 
-        for day in self["conference"]["days"]:
+        self._invalidate_indexes()
+        for day_position, day in enumerate(self["conference"]["days"]):
             if room_key in day["rooms"]:
+                for position, event in enumerate(self._hydrated(day["rooms"][room_key])):
+                    if self._events_by_guid is not None:
+                        self._unindex_event((day_position, room_key, position), event)
+                    if self._stats is not None and not self._stats.remove(event, day["index"], room_key):
+                        self._stats = None
                 del day["rooms"][room_key]
 
-    def event(self, guid: str) -> Event:
-        for day in self["conference"]["days"]:
+    def _build_event_index(self):
+        self._events_by_guid = {}
+        self._events_by_id = {}
+        for day_position, day in enumerate(self["conference"]["days"]):
             for room in day["rooms"]:
-                for event in day["rooms"][room]:
-                    if event['guid'] == guid:
-                        if isinstance(event, Event):
-                            return event
-                        else:
-                            return Event(event)
+                for position, event in enumerate(day["rooms"][room]):
+                    self._index_event((day_position, room, position), event)
+
+    def _index_event(self, location: tuple[int, str, int], event):
+        if event.get('guid'):
+            self._events_by_guid[event['guid']] = location
+        if event.get('id') is not None:
+            self._events_by_id.setdefault(str(event['id']), {})[location] = None
+
+    def _unindex_event(self, location: tuple[int, str, int], event):
+        if event.get('guid') and self._events_by_guid.get(event['guid']) == location:
+            del self._events_by_guid[event['guid']]
+        if event.get('id') is not None:
+            locations = self._events_by_id.get(str(event['id']), {})
+            locations.pop(location, None)
+            if not locations:
+                self._events_by_id.pop(str(event['id']), None)
+
+    def _event_at(self, location: tuple[int, str, int]):
+        day_position, room, position = location
+        try:
+            return self["conference"]["days"][day_position]["rooms"][room][position]
+        except (IndexError, KeyError, TypeError):
+            return None
+
+    def _locate_events(self, id=None, guid=None) -> list[tuple[int, str, int]]:
+        """
+        returns the (day position, room name, event position) of all events matching id or guid.
+        The index is built on first use and kept up to date by the Schedule methods. Events added or
+        re-identified behind its back (Event.__setitem__, the raw day/room dicts) are still found:
+        stale hits are checked against the event, and a miss scans the events like before the index existed.
+        """
+
+        def lookup():
+            locations = {}
+            if guid and guid in self._events_by_guid:
+                locations[self._events_by_guid[guid]] = None
+            if id is not None and str(id) in self._events_by_id:
+                locations.update(self._events_by_id[str(id)])
+            return list(locations)
+
+        def matches(event):
+            return event is not None and (
+                (guid and event.get('guid') == guid) or (id is not None and str(event.get('id')) == str(id))
+            )
+
+        if self._events_by_guid is None:
+            self._build_event_index()
+            return lookup()
+
+        locations = lookup()
+        if locations and all(matches(self._event_at(location)) for location in locations):
+            return locations
+
+        if not locations:
+            # a real miss costs one traversal without allocations, the index is only rebuilt if it was stale
+            if not self._scan_events(id, guid):
+                return []
+
+        # an event moved, changed its guid/id or was added behind the index
+        self._build_event_index()
+        return lookup()
+
+    def _scan_events(self, id=None, guid=None) -> bool:
+        """whether any event has this guid or id, looking at the event data directly as the baseline lookup did"""
+        id = str(id) if id is not None else None
+        for day in self["conference"]["days"]:
+            for events in day["rooms"].values():
+                for event in events:
+                    data = event._event if isinstance(event, Event) else event
+                    if guid and data.get('guid') == guid:
+                        return True
+                    if id is not None and data.get('id') is not None and str(data['id']) == id:
+                        return True
+        return False
+
+    @staticmethod
+    def _hydrated(events: list) -> Iterator[Event]:
+        """wraps raw event dicts of a room list only once, the Event objects replace them in the schedule"""
+        for position, event in enumerate(events):
+            if not isinstance(event, Event):
+                event = events[position] = Event(event)
+            yield event
+
+    def _hydrated_event_at(self, location: tuple[int, str, int]) -> Event:
+        event = self._event_at(location)
+        if not isinstance(event, Event):
+            day_position, room, position = location
+            event = self["conference"]["days"][day_position]["rooms"][room][position] = Event(event)
+        return event
+
+    def event(self, guid: str) -> Event:
+        for location in self._locate_events(guid=guid):
+            return self._hydrated_event_at(location)
 
     def events(self):
         for day in self["conference"]["days"]:
             for room in day["rooms"]:
-                for event in day["rooms"][room]:
-                    yield event if isinstance(event, Event) else Event(event)
+                yield from self._hydrated(day["rooms"][room])
+
+    def _invalidate_indexes(self):
+        self._events_by_field = {}
+        self._timeline = None
+
+    def _invalidate_event_index(self):
+        # rebuilt on the next lookup, for changes which might touch guids, ids or positions of any event
+        self._events_by_guid = None
+        self._events_by_id = None
+
+    def _field_index(self, field: str) -> dict[str, list[Event]]:
+        if field not in self._events_by_field:
+            index = {}
+            for event in self.events():
+                index.setdefault(event[field], []).append(event)
+            self._events_by_field[field] = index
+        return self._events_by_field[field]
+
+    def query(self, room=None, track=None, type=None, day=None, between=None, guid_in=None, id_in=None, filter: Callable | None = None) -> Iterator[Event]:
+        """
+        Lazily yields the events matching all given criteria. room, track, type and day (index starting at 1)
+        take a single value or a collection, between=(start, end) matches events overlapping this time span.
+
+        Only candidates are looked at: guid_in/id_in use the event index, room and day pick the room lists
+        directly and track/type use an index built on first use. The track/type index is dropped by every
+        change via Schedule methods, after editing these fields through the raw dicts call query() with room or day.
+        """
+        def as_set(value):
+            if value is None or isinstance(value, (set, frozenset)):
+                return value
+            return {value} if isinstance(value, (str, int)) else set(value)
+
+        rooms, tracks, types, days = as_set(room), as_set(track), as_set(type), as_set(day)
+
+        def matches(event: Event):
+            return (rooms is None or event['room'] in rooms) \
+                and (tracks is None or event['track'] in tracks) \
+                and (types is None or event['type'] in types) \
+                and (between is None or (event.start < between[1] and event.end > between[0])) \
+                and (filter is None or filter(event))
+
+        if guid_in is not None or id_in is not None:
+            locations = {}
+            for guid in guid_in or []:
+                locations.update(dict.fromkeys(self._locate_events(guid=guid)))
+            for id in id_in or []:
+                locations.update(dict.fromkeys(self._locate_events(id=id)))
+
+            for location in locations:
+                if days is None or location[0] + 1 in days:
+                    event = self._hydrated_event_at(location)
+                    if matches(event):
+                        yield event
+            return
+
+        if rooms is None and days is None and (tracks is not None or types is not None):
+            field, values = ('track', tracks) if tracks is not None else ('type', types)
+            index = self._field_index(field)
+            for value in values:
+                for event in index.get(value, []):
+                    if matches(event):
+                        yield event
+            return
+
+        for day_position, day in enumerate(self["conference"]["days"]):
+            if days is not None and day_position + 1 not in days:
+                continue
+            for room in day["rooms"]:
+                if rooms is None or room in rooms:
+                    for event in self._hydrated(day["rooms"][room]):
+                        if matches(event):
+                            yield event
+
+    def timeline(self) -> Timeline:
+        """per room index of all events sorted by start time, kept until the schedule is changed via its methods"""
+        if self._timeline is None:
+            self._timeline = Timeline(self)
+        return self._timeline
+
+    def now(self, room: str, time: datetime | None = None) -> list[Event]:
+        """events running in room at time (default: now), in O(log n)"""
+        return self.timeline().room(room).now(time or datetime.now(self.tz()))
+
+    def next(self, room: str, time: datetime | None = None) -> Event | None:
+        """first event starting in room after time (default: now), in O(log n)"""
+        return self.timeline().room(room).next(time or datetime.now(self.tz()))
+
+    def between(self, room: str, start: datetime, end: datetime) -> list[Event]:
+        """events in room overlapping the time span from start to end"""
+        return self.timeline().room(room).between(start, end)
+
+    def conflicts(self, **args) -> ConflictReport:
+        """double bookings, overlaps and gaps of events in the same room, e.g. after merging several sources into shared rooms"""
+        return self.timeline().conflicts(**args)
 
     def add_event(self, event: Event, options=None):
         day = self.get_day_from_time(event.start)
@@ -443,16 +748,26 @@ class Schedule(dict):
         if not self.room_exists(day, event["room"]):
             self.add_room_on_day(day, event["room"])
 
-        self.days()[day - 1]["rooms"][event["room"]].append(event)
+        events = self.days()[day - 1]["rooms"][event["room"]]
+        events.append(event)
+        self._invalidate_indexes()
+        if self._stats is not None:
+            self._stats.add(event, day, event["room"])
+        if self._events_by_guid is not None:
+            self._index_event((day - 1, event["room"], len(events) - 1), event)
 
     def foreach_event(self, func, *args):
         out = []
         for day in self["conference"]["days"]:
             for room in day["rooms"]:
-                for event in day["rooms"][room]:
-                    result = func(event if isinstance(event, Event) else Event(event), *args)
+                for event in self._hydrated(day["rooms"][room]):
+                    result = func(event, *args)
                     if result:
                         out.append(result)
+        # func might have changed indexed fields
+        self._invalidate_indexes()
+        self._invalidate_event_index()
+        self._stats = None
         return out
 
     def foreach_event_raw(self, func, *args):
@@ -464,6 +779,9 @@ class Schedule(dict):
                     if result:
                         out.append(result)
 
+        self._invalidate_indexes()
+        self._invalidate_event_index()
+        self._stats = None
         return out
 
     def foreach_day_room(self, func):
@@ -474,79 +792,47 @@ class Schedule(dict):
                 if result:
                     out.append(result)
 
+        self._invalidate_indexes()
+        self._invalidate_event_index()
+        self._stats = None
         return out
 
-    def _generate_stats(self, enable_time_stats=False, verbose=False):
+    @property
+    def stats(self) -> ScheduleStats:
+        """
+        Statistics of the events, updated incrementally by add_event(), add_room_with_events(), remove_*() and rename_rooms().
+        foreach_event(), transform_events() and changes to the raw dicts can not be tracked, after them stats are recalculated on next use.
+        """
+        if self._stats is None:
+            self._generate_stats()
+        return self._stats
 
-        self.stats = ScheduleStats()
-
-        def calc_stats(event: Event):
-            self.stats.events_count += 1
-
-            id = int(event["id"])
-            if self.stats.min_id is None or id < self.stats.min_id:
-                self.stats.min_id = id
-            if self.stats.max_id is None or id > self.stats.max_id:
-                self.stats.max_id = id
-
-            if self.stats.first_event is None or event.start < self.stats.first_event.start:
-                self.stats.first_event = event
-            if self.stats.last_event is None or event.start < self.stats.last_event.start:
-                self.stats.last_event = event
-
-            for person in event.persons():
-                try:
-                    if "id" in person and (isinstance(person["id"], int) or person["id"].isnumeric()):
-                        if (
-                            self.stats.person_min_id is None
-                            or int(person["id"]) < self.stats.person_min_id
-                        ):
-                            self.stats.person_min_id = int(person["id"])
-                        if (
-                            self.stats.person_max_id is None
-                            or int(person["id"]) > self.stats.person_max_id
-                        ):
-                            self.stats.person_max_id = int(person["id"])
-                except Exception:
-                    pass
-
-        self.foreach_event(calc_stats)
+    def _generate_stats(self, enable_time_stats=False, verbose=False):
+        stats = ScheduleStats()
+        for day in self["conference"]["days"]:
+            for room in day["rooms"]:
+                for event in self._hydrated(day["rooms"][room]):
+                    stats.add(event, day["index"], room)
+        self._stats = stats
 
         if verbose:
-            try:
-                print(f"  from {self['conference']['start']} to {self['conference']['end']}")
-                print( "  contains {events_count} events, with local ids from {min_id} to {max_id}".format(**self.stats.__dict__))  # noqa
-                print( "    local person ids from {person_min_id} to {person_max_id}".format(**self.stats.__dict__)) # noqa
-            except Exception:
-                pass
-            print(f"    rooms: {', '.join(self.rooms())}")
-
-    def print_stats(self):
-        if 'base_url' in self:
-            print(f"  system {self['base_url']}")
-        
-        self._generate_stats(verbose=True)
+            self._print_stats()
 
-        '''
-        print(
-            f"  from {self['conference']['start']} to {self['conference']['end']}"
-        )
-        print(
-            "  contains {events_count} events, with local ids from {min_id} to {max_id}".format(
-                **self.stats.__dict__
-            )
-        )  # noqa
+    def _print_stats(self):
         try:
-            print(
-                "    local person ids from {person_min_id} to {person_max_id}".format(
-                    **self.stats.__dict__
-                )
-            )  # noqa
+            print(f"  from {self['conference']['start']} to {self['conference']['end']}")
+            print( "  contains {events_count} events, with local ids from {min_id} to {max_id}".format(**self.stats.__dict__))  # noqa
+            print( "    local person ids from {person_min_id} to {person_max_id}".format(**self.stats.__dict__)) # noqa
+            print(f"    {self.stats.minutes} minutes, per day: {', '.join(f'{day}: {count}' for day, count in sorted(self.stats.days.items()))}")
         except Exception:
             pass
+        print(f"    rooms: {', '.join(self.rooms())}")
 
-        print(f"    rooms: {', '.join(self  .rooms())}")
-        '''
+    def print_stats(self):
+        if 'base_url' in self:
+            print(f"  system {self['base_url']}")
+
+        self._print_stats()
 
     def get_day_from_time(self, start_time):
         for i in range(self.conference("daysCount")):
@@ -643,13 +929,19 @@ class Schedule(dict):
 
                     if options.get("prefix_person_ids"):
                         prefix = options.get("prefix_person_ids")
-                        for person in event["persons"]:
-                            person["id"] = f"{prefix}-{person['id']}"
+                        # replaced instead of modified in place, the list might be shared with copies of the schedule
+                        event["persons"] = [{**person, "id": f"{prefix}-{person['id']}"} for person in event["persons"]]
 
                     events.append(event if isinstance(event, Event) else Event(event, origin=other_schedule))
 
                 # copy whole day_room to target schedule
                 self.add_room_with_events(target_day, target_room, events)
+
+        # ids, rooms and titles of the other schedule's events might have been rewritten above
+        if isinstance(other_schedule, Schedule):
+            other_schedule._invalidate_indexes()
+            other_schedule._invalidate_event_index()
+            other_schedule._stats = None
         return True
 
     def find_event(self, id=None, guid=None):
@@ -657,20 +949,20 @@ class Schedule(dict):
             raise RuntimeError("Please provide either id or guid")
 
         if id:
-            result = self.foreach_event(
-                lambda event: event if event["id"] == id else None
-            )
+            locations = self._locate_events(id=id)
         else:
-            result = self.foreach_event(
-                lambda event: event if event["guid"] == guid else None
-            )
+            locations = self._locate_events(guid=guid)
+
+        result = []
+        for location in locations:
+            result.append(self._hydrated_event_at(location))
 
         if len(result) > 1:
-            log.warning("Warning: Found multiple events with id " + id)
+            log.warning(f"Warning: Found multiple events with id {id or guid}")
             return result
 
         if len(result) == 0:
-            raise Warning("could not find event with id " + id)
+            raise Warning(f"could not find event with id {id or guid}")
             # return None
 
         return result[0]
@@ -679,16 +971,68 @@ class Schedule(dict):
         if not id and not guid:
             raise RuntimeError("Please provide either id or guid")
 
-        for day in self["conference"]["days"]:
+        self._invalidate_indexes()
+        # remove from the back, so positions of the remaining matches in the same room stay valid
+        for location in sorted(self._locate_events(id=id, guid=guid), reverse=True):
+            day_position, room, position = location
+            events = self["conference"]["days"][day_position]["rooms"][room]
+            event = events.pop(position)
+            log.info(f"removing {event['title']}")
+            if self._stats is not None:
+                day = self["conference"]["days"][day_position]
+                if not isinstance(event, Event) or not self._stats.remove(event, day["index"], room):
+                    self._stats = None
+
+            # shift index entries of the following events in this room
+            self._unindex_event(location, event)
+            for i in range(position, len(events)):
+                self._unindex_event((day_position, room, i + 1), events[i])
+                self._index_event((day_position, room, i), events[i])
+
+    def remove_events(self, guids=None, ids=None, filter: Callable | None = None) -> list[Event]:
+        """Remove all events matching one of the guids, ids or the filter predicate in a single pass, returns the removed events"""
+        guids = set(guids or [])
+        ids = {str(id) for id in ids or []}
+
+        def keep(event: Event):
+            if event['guid'] in guids or str(event['id']) in ids or (filter and filter(event)):
+                return None
+            return event
+
+        return self.transform_events(keep)
+
+    def transform_events(self, func, *args) -> list[Event]:
+        """
+        Call func for each event and rebuild every room list in one pass:
+        func can modify the event in place, return a replacement event, or return None to remove it.
+        Returns the removed events.
+        """
+        removed = []
+        self._invalidate_indexes()
+        self._stats = None
+        reindex = self._events_by_guid is not None
+        if reindex:
+            self._events_by_guid = {}
+            self._events_by_id = {}
+
+        for day_position, day in enumerate(self["conference"]["days"]):
             for room in day["rooms"]:
-                for event in day["rooms"][room]:
-                    if (
-                        event["id"] == id
-                        or event["id"] == str(id)
-                        or event["guid"] == guid
-                    ):
-                        log.info("removing", event["title"])
-                        day["rooms"][room].remove(event)
+                events = []
+                for event in self._hydrated(day["rooms"][room]):
+                    result = func(event, *args)
+                    if result is None or result is False:
+                        log.info(f"removing {event['title']}")
+                        removed.append(event)
+                        continue
+
+                    events.append(result)
+                    if reindex:
+                        self._index_event((day_position, room, len(events) - 1), events[-1])
+
+                # replace list content in place, as callers might hold references to the room lists
+                day["rooms"][room][:] = events
+
+        return removed
 
     # dict_to_etree from http://stackoverflow.com/a/10076823
 
@@ -696,148 +1040,151 @@ class Schedule(dict):
     #  * check links conversion
     #  * ' vs " in xml
     #  * logo is in json but not in xml
-    # formerly named dict_to_schedule_xml()
-    def xml(self, method="string"):
-        root_node = None
-
-        def dict_to_attrib(d, root):
-            assert isinstance(d, dict)
+    def _xml_dict_to_attrib(self, d, root):
+        assert isinstance(d, dict)
+        for k, v in d.items():
+            assert self._xml_set_attrib(root, k, v)
+
+    @staticmethod
+    def _xml_set_attrib(tag, k, v):
+        if isinstance(v, str):
+            tag.set(k, v)
+        elif isinstance(v, int):
+            tag.set(k, str(v))
+        elif v is not None:
+            log.error(f"  schedule.xml serialization error: unknown attribute type {k}={v}")
+
+    def _xml_to_etree(self, d, node, parent="", root_node=None):
+        if not d:
+            pass
+        elif isinstance(d, str):
+            node.text = d
+        elif isinstance(d, int):
+            node.text = str(d)
+        elif parent == "person":
+            node.text = d.get("public_name") or d.get('full_public_name') or d.get('full_name') or d.get('name')
+            if "id" in d:
+                self._xml_set_attrib(node, "id", d["id"])
+            if "guid" in d:
+                self._xml_set_attrib(node, "guid", d["guid"])
+
+        elif (
+            isinstance(d, dict)
+            or isinstance(d, OrderedDict)
+            or isinstance(d, Event)
+            or isinstance(d, ScheduleDay)
+        ):
+            # location of base_url sadly differs in frab's json and xml serialization :-(
+            if parent == "schedule" and "base_url" in d:
+                d["conference"]["base_url"] = d["base_url"]
+                del d["base_url"]
+
+            # count variable is used to check how many items actually end as elements
+            # (as they are mapped to an attribute)
+            count = len(d)
+            recording_license = ""
             for k, v in d.items():
-                assert _set_attrib(root, k, v)
-
-        def _set_attrib(tag, k, v):
-            if isinstance(v, str):
-                tag.set(k, v)
-            elif isinstance(v, int):
-                tag.set(k, str(v))
-            elif v is not None:
-                log.error(f"  schedule.xml serialization error: unknown attribute type {k}={v}")
-
-        def _to_etree(d, node, parent=""):
-            if not d:
-                pass
-            elif isinstance(d, str):
-                node.text = d
-            elif isinstance(d, int):
-                node.text = str(d)
-            elif parent == "person":
-                node.text = d.get("public_name") or d.get('full_public_name') or d.get('full_name') or d.get('name')
-                if "id" in d:
-                    _set_attrib(node, "id", d["id"])
-                if "guid" in d:
-                    _set_attrib(node, "guid", d["guid"])
-
-            elif (
-                isinstance(d, dict)
-                or isinstance(d, OrderedDict)
-                or isinstance(d, Event)
-                or isinstance(d, ScheduleDay)
-            ):
-                # location of base_url sadly differs in frab's json and xml serialization :-(
-                if parent == "schedule" and "base_url" in d:
-                    d["conference"]["base_url"] = d["base_url"]
-                    del d["base_url"]
-
-                # count variable is used to check how many items actually end as elements
-                # (as they are mapped to an attribute)
-                count = len(d)
-                recording_license = ""
-                for k, v in d.items():
-                    if parent == "day":
-                        if k[:4] == "day_":
-                            # remove day_ prefix from items
-                            k = k[4:]
-
-                    if (
-                        k == "id"
-                        or k == "guid"
-                        or k == "code"
-                        or (parent == "day" and isinstance(v, (str, int)))
-                        or parent == "generator"
-                        or parent == "track"
-                        or parent == "color"
-                    ):
-                        _set_attrib(node, k, v)
-                        count -= 1
-                    elif k == "url" and parent in ["link", "attachment"]:
-                        _set_attrib(node, "href", v)
-                        count -= 1
-                    elif k == "title" and parent in ["link", "attachment"]:
-                        node.text = v
-                    elif parent in ["link", "attachment"]:
-                        _set_attrib(node, k, v)
-                        count -= 1
-                    elif count == 1 and isinstance(v, str):
-                        node.text = v
+                if parent == "day":
+                    if k[:4] == "day_":
+                        # remove day_ prefix from items
+                        k = k[4:]
+
+                if (
+                    k == "id"
+                    or k == "guid"
+                    or k == "code"
+                    or (parent == "day" and isinstance(v, (str, int)))
+                    or parent == "generator"
+                    or parent == "track"
+                    or parent == "color"
+                ):
+                    self._xml_set_attrib(node, k, v)
+                    count -= 1
+                elif k == "url" and parent in ["link", "attachment"]:
+                    self._xml_set_attrib(node, "href", v)
+                    count -= 1
+                elif k == "title" and parent in ["link", "attachment"]:
+                    node.text = v
+                elif parent in ["link", "attachment"]:
+                    self._xml_set_attrib(node, k, v)
+                    count -= 1
+                elif count == 1 and isinstance(v, str):
+                    node.text = v
+                else:
+                    node_ = node
+
+                    if parent == "room":
+                        # create room tag for each instance of a room name
+                        node_ = ET.SubElement(node, "room")
+                        node_.set("name", k or '')
+                        if k in self._room_ids and self._room_ids[k]:
+                            node_.set("guid", self._room_ids[k])
+
+                        k = "event"
+
+                    if k == "days":
+                        # in the xml schedule days are not a child of a conference,
+                        # but directly in the document node
+                        node_ = root_node
+
+                    # ignore room list on confernce
+                    if k == 'rooms' and parent == 'conference':
+                        continue
+                    # special handing for collections: days, rooms etc.
+                    elif k[-1:] == "s":
+                        # don't ask me why the pentabarf schedule xml schema is so inconsistent --Andi
+                        # create collection tag for specific tags, e.g. persons, links etc.
+                        if parent == "event":
+                            node_ = ET.SubElement(node, k)
+
+                        # remove last char (which is an s)
+                        k = k[:-1]
+                    # different notation for conference length in days
+                    elif parent == "conference" and k == "daysCount":
+                        k = "days"
+                    # special handling for recoding_licence and do_not_record flag
+                    elif k == "recording_license":
+                        # store value for next loop iteration
+                        recording_license = v
+                        # skip forward to next loop iteration
+                        continue
+                    elif k == "do_not_stream":
+                        # we dont expose this flag to the schedule.xml, only in schedule.json
+                        continue
+                    elif k == "do_not_record" or k == "recording":
+                        k = "recording"
+                        # not in schedule.json: license information for an event
+                        v = {
+                            "license": recording_license,
+                            "optout": v,
+                        }
+                    # new style schedule.json (version 2022-12)
+                    elif k == "optout":
+                        v = "true" if v is True else "false"
+
+                    # iterate over lists
+                    if isinstance(v, list):
+                        for element in v:
+                            self._xml_to_etree(element, ET.SubElement(node_, k), k, root_node)
+                    # don't single empty room tag, as we have to create one for each room, see above
+                    elif parent == "day" and k == "room":
+                        self._xml_to_etree(v, node_, k, root_node)
                     else:
-                        node_ = node
-
-                        if parent == "room":
-                            # create room tag for each instance of a room name
-                            node_ = ET.SubElement(node, "room")
-                            node_.set("name", k or '')
-                            if k in self._room_ids and self._room_ids[k]:
-                                node_.set("guid", self._room_ids[k])
-
-                            k = "event"
-
-                        if k == "days":
-                            # in the xml schedule days are not a child of a conference,
-                            # but directly in the document node
-                            node_ = root_node
-
-                        # ignore room list on confernce
-                        if k == 'rooms' and parent == 'conference':
-                            continue
-                        # special handing for collections: days, rooms etc.
-                        elif k[-1:] == "s":
-                            # don't ask me why the pentabarf schedule xml schema is so inconsistent --Andi
-                            # create collection tag for specific tags, e.g. persons, links etc.
-                            if parent == "event":
-                                node_ = ET.SubElement(node, k)
-
-                            # remove last char (which is an s)
-                            k = k[:-1]
-                        # different notation for conference length in days
-                        elif parent == "conference" and k == "daysCount":
-                            k = "days"
-                        # special handling for recoding_licence and do_not_record flag
-                        elif k == "recording_license":
-                            # store value for next loop iteration
-                            recording_license = v
-                            # skip forward to next loop iteration
-                            continue
-                        elif k == "do_not_stream":
-                            # we dont expose this flag to the schedule.xml, only in schedule.json
-                            continue
-                        elif k == "do_not_record" or k == "recording":
-                            k = "recording"
-                            # not in schedule.json: license information for an event
-                            v = {
-                                "license": recording_license,
-                                "optout": v,
-                            }
-                        # new style schedule.json (version 2022-12)
-                        elif k == "optout":
-                            v = "true" if v is True else "false"
-
-                        # iterate over lists
-                        if isinstance(v, list):
-                            for element in v:
-                                _to_etree(element, ET.SubElement(node_, k), k)
-                        # don't single empty room tag, as we have to create one for each room, see above
-                        elif parent == "day" and k == "room":
-                            _to_etree(v, node_, k)
-                        else:
-                            _to_etree(v, ET.SubElement(node_, k), k)
-            else:
-                assert d == "invalid type"
-
-        assert isinstance(self, dict)
+                        self._xml_to_etree(v, ET.SubElement(node_, k), k, root_node)
+        else:
+            assert d == "invalid type"
 
+    def _xml_root_node(self):
         root_node = ET.Element("schedule", attrib={"{http://www.w3.org/2001/XMLSchema-instance}noNamespaceSchemaLocation": "https://c3voc.de/schedule/schema.xsd"})
         ET.SubElement(root_node, "generator", self.generator or tools.generator_info())
-        _to_etree(self, root_node, "schedule")
+        return root_node
+
+    # formerly named dict_to_schedule_xml()
+    def xml(self, method="string"):
+        assert isinstance(self, dict)
+
+        root_node = self._xml_root_node()
+        self._xml_to_etree(self, root_node, "schedule", root_node)
 
         if method == 'xml' or method == 'etree':
             return root_node
@@ -846,6 +1193,56 @@ class Schedule(dict):
 
         return ET.tostring(root_node, pretty_print=True, encoding="unicode", doctype='<?xml version="1.0"?>')
 
+    def write_xml(self, fp):
+        """
+        Writes the same document as xml() to the text file fp, but serializes one event at a time,
+        so the memory usage does not grow with the size of the schedule.
+        """
+        if not self.days():
+            fp.write(self.xml())
+            return
+
+        # build the document without any events, the empty day node marks where the days belong
+        root_node = self._xml_root_node()
+        skeleton = {**self, "conference": {**self["conference"], "days": [{}]}}
+        self._xml_to_etree(skeleton, root_node, "schedule", root_node)
+        head, _, tail = ET.tostring(root_node, pretty_print=True, encoding="unicode", doctype='<?xml version="1.0"?>') \
+            .partition("\n  <day/>\n")
+        fp.write(head + "\n")
+
+        def write_node(node, level, children):
+            # opening tag of a node without its children, e.g. <day index="1" date="…">
+            tag = ET.tostring(node, encoding="unicode")
+            if not children:
+                fp.write("  " * level + tag + "\n")
+                return False
+            fp.write("  " * level + tag[:-2] + ">\n")
+            return True
+
+        for day in self.days():
+            # like xml(), days without rooms are allowed
+            rooms = day.get("rooms", {})
+            day_node = ET.Element("day")
+            self._xml_to_etree({**day, "rooms": {}}, day_node, "day", root_node)
+            if not write_node(day_node, 1, rooms):
+                continue
+
+            for room, events in rooms.items():
+                # let the regular serialization create the room node incl. name and guid
+                self._xml_to_etree({room: []}, day_node, "room", root_node)
+                if not write_node(day_node[-1], 2, events):
+                    continue
+
+                for event in events:
+                    event_node = ET.Element("event")
+                    self._xml_to_etree(event, event_node, "event", root_node)
+                    ET.indent(event_node, space="  ", level=3)
+                    fp.write("      " + ET.tostring(event_node, encoding="unicode") + "\n")
+                fp.write("    </room>\n")
+            fp.write("  </day>\n")
+
+        fp.write(tail)
+
     def json(self, method="json", **args):
         json = {
             "$schema": "https://c3voc.de/schedule/schema.json",
@@ -855,13 +1252,12 @@ class Schedule(dict):
             }
         }
         if method == 'string':
-            return json.dumps(self, indent=2, cls=ScheduleEncoder, **args)
+            return tools.dumps_json(json, cls=ScheduleEncoder)
 
         return json
 
     def filter(self, name: str, rooms: Union[List[Union[str, Room]], Callable]):
         log.info(f'\nExporting {name}... ')
-        schedule = self.copy(name)
 
         if callable(rooms):
             def filterRoom(room):
@@ -884,19 +1280,27 @@ class Schedule(dict):
                     return room['name'] in room_names or \
                         room.get('guid', '') in room_guids
 
-        for room in schedule.rooms(mode='obj'):
-            if not filterRoom(room):
-                log.info(f"deleting room {room.name} on conference")
-                schedule.remove_room(room.name)
+        removed_rooms = [room.name for room in self.rooms(mode='obj') if not filterRoom(room)]
+        schedule = self.copy(name, rooms=lambda room_name: room_name not in removed_rooms)
+
+        for room_name in removed_rooms:
+            log.info(f"deleting room {room_name} on conference")
+            schedule.remove_room(room_name)
 
         schedule['version'] = self.version().split(';')[0]
         return schedule
 
-    def export(self, prefix_or_target):
-        """Export schedule to json and xml files, validate xml"""
+    def export(self, prefix_or_target, delta=False, conflicts=False, timeline=False):
+        """
+        Export schedule to json and xml files, validate xml.
+        With delta=True also write the changes since the previous export to a .delta.json file next to the schedule.json,
+        with conflicts=True print overlapping events in the same room,
+        with timeline=True write a .timeline.json with per room sorted start/end times for now/next lookups.
+        """
 
         target_json = None
         target_xml = None
+        previous_id = None
 
         if prefix_or_target.endswith(".json"):
             target_json = prefix_or_target
@@ -907,25 +1311,83 @@ class Schedule(dict):
             target_xml = f"{prefix_or_target}.schedule.xml"
 
         if target_json:
+            self._previous_export = None
+            if path.isfile(target_json):
+                with open(target_json, "r") as fp:
+                    self._previous_export = fp.read()
+                previous_id = content_id(self._previous_export)
+
+            data = self.json()
             with open(target_json, "w") as fp:
-                json.dump(self.json(), fp, indent=2, cls=ScheduleEncoder)
+                tools.dump_json(data, fp, cls=ScheduleEncoder)
+
+            # the structural diff decides whether the export is worth a commit, a new version alone is not
+            changes = self.changes()
+            publish.wrote(target_json, changed=changes is None or bool(changes))
+
+            # the same document as written, without parsing the file again
+            validation.report(target_json, validation.validate_json(data, file=target_json))
 
-            # TODO we should also validate the json file here
+            if delta and previous_id and changes is not None:
+                self.export_delta(target_json, previous_id, changes)
+
+        # the xml and timeline follow the schedule.json, if there is one
+        follows_json = target_json is not None
 
         if target_xml:
             with open(target_xml, "w") as fp:
-                fp.write(self.xml())
+                self.write_xml(fp)
+            publish.wrote(target_xml, changed=not follows_json)
+
+            validation.report(target_xml, validation.validate_xml(target_xml))
+
+        if timeline:
+            target_timeline = re.sub(r"(\.schedule)?\.(json|xml)$", "", prefix_or_target) + ".timeline.json"
+            with open(target_timeline, "w") as fp:
+                tools.dump_json({"version": self.version(), "rooms": self.timeline().json()}, fp)
+            publish.wrote(target_timeline, changed=not follows_json)
+
+        if conflicts:
+            report = self.conflicts()
+            if report:
+                log.warning(f"{prefix_or_target} has overlapping events:")
+            report.print()
+
+    def export_delta(self, target_json: str, previous_id: str, changes: ScheduleDiff):
+        with open(target_json, "r") as fp:
+            id = content_id(fp.read())
+
+        previous_version = self._previous_export.version()
+        target_delta = re.sub(r"(\.schedule)?\.json$", ".delta.json", target_json)
+        with open(target_delta, "w") as fp:
+            tools.dump_json(changes.delta(id, previous_id, self.version(), previous_version), fp, cls=ScheduleEncoder)
+        publish.wrote(target_delta, changed=False)
+
+    def changes(self) -> ScheduleDiff | None:
+        """Compare the schedule with the schedule.json its last export() replaced, None if there was no previous file"""
+        if isinstance(self._previous_export, str):
+            try:
+                self._previous_export = Schedule(json=tools.parse_json(self._previous_export))
+            except Exception as e:
+                log.warning(f"could not load previous export for comparison: {e}")
+                self._previous_export = None
 
-            # TODO use python XML validator instead of shell call
-            # validate xml
-            result = os.system(
-                f'/bin/bash -c "{validator} {target_xml} 2>&1 {validator_filter}; exit \\${{PIPESTATUS[0]}}"'
-            )
-            if result != 0 and validator_filter:
-                log.warning("  (validation errors might be hidden by validator_filter)")
+        if self._previous_export is None:
+            return None
+
+        return diff(self._previous_export, self)
+
+    def validate(self):
+        """Validate schedule against the XML and JSON schema, raises ScheduleException with all unfiltered errors"""
+        errors = validation.validate_xml(self.xml(method="etree")) \
+            + validation.validate_json(self.json())
+
+        errors = validation.apply_filter(errors)
+        if errors:
+            raise ScheduleException("\n".join(str(e) for e in errors))
 
     def __str__(self):
-        return json.dumps(self, indent=2, cls=ScheduleEncoder)
+        return tools.dumps_json(self, cls=ScheduleEncoder)
 
 
 class ScheduleEncoder(json.JSONEncoder):
@@ -2,14 +2,15 @@ from collections.abc import Callable, Generator
 import xml.etree.ElementTree as ET
 from xml.etree.ElementTree import ElementTree
 from datetime import datetime, timedelta 
-import dateutil.parser
-
-import requests
 
 try:
     from voc.event import Event
+    from voc.timestamps import parse_datetime
+    import voc.httpcache as httpcache
 except ImportError:
     from event import Event
+    from timestamps import parse_datetime
+    import httpcache
 
 
 # from https://git.cccv.de/hub/hub/-/blob/develop/src/core/schedules/schedulexml.py#L65
@@ -29,7 +30,7 @@ class ScheduleXML:
 
     @classmethod
     def from_url(cls, url):
-        r = requests.get(url)
+        r = httpcache.get(url, timeout=None)
 
         if r.ok is False:
             raise Exception(f'Request failed, HTTP {r.status_code}.')
@@ -100,6 +101,26 @@ class ScheduleXML:
                     e['guid'] = event.attrib.get('guid')
                     yield e
 
+    def query(self, room=None, guid_in=None, id_in=None, filter: Callable|None = None) -> Generator['EventXML', None, None]:
+        """subset of Schedule.query(), filters the XML nodes before creating EventXML objects, filter is called with each EventXML"""
+        rooms = {room} if isinstance(room, str) else room
+        guids = set(guid_in or [])
+        ids = {str(id) for id in id_in or []}
+
+        for day in self.days():
+            date = day.attrib.get('date')
+            for room_node in day.findall('room'):
+                if rooms is not None and room_node.attrib.get('name') not in rooms:
+                    continue
+                for event in room_node.findall('event'):
+                    if (guids or ids) and event.attrib.get('guid') not in guids and event.attrib.get('id') not in ids:
+                        continue
+                    e = EventXML(event, parent=self, day_date=date)
+                    e['id'] = event.attrib.get('id')
+                    e['guid'] = event.attrib.get('guid')
+                    if filter is None or filter(e):
+                        yield e
+
     # TODO: make this more efficient by: 
     #   a) filter before creating Event objects  and/or
     #   b) building an index of events by id and guid
@@ -133,14 +154,14 @@ class EventXML(Event[ElementTree]):
             node = self._event.find('date')
             
             if node is not None:
-                self.start = dateutil.parser.parse(node.text)
+                self.start = parse_datetime(node.text)
             elif day_date:
                 # If no 'date' on Event, combine day_date with event's start time
                 start_node = self._event.find('start')
                 if start_node is not None and start_node.text:
                     # Combine day date with event start time
                     combined = f"{day_date} {start_node.text}"
-                    self.start = dateutil.parser.parse(combined)
+                    self.start = parse_datetime(combined)
                     # Store the combined date in _values for Event class
                     self._values['date'] = self.start.isoformat()
                 else:
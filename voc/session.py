@@ -0,0 +1,95 @@
+"""
+Shared HTTP session for all schedule sources and pushers
+
+Instead of opening a new connection for every `requests.get()`, all modules use one session,
+which keeps connections per host alive, retries failed idempotent requests with exponential
+backoff and limits the number of parallel requests to the same host.
+
+    from voc import session
+    session.configure(retries=5, max_per_host=2)
+    r = session.get(url)
+"""
+from threading import BoundedSemaphore, Lock
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+timeout: float = 30
+retries: int = 3
+backoff_factor: float = 0.5
+pool_maxsize: int = 10
+max_per_host: int = 4
+
+_session = None
+_session_lock = Lock()
+
+
+class Session(requests.Session):
+    """requests.Session with retry/backoff and a limit of concurrent requests per host"""
+
+    def __init__(self, retries=retries, backoff_factor=backoff_factor, pool_maxsize=pool_maxsize, max_per_host=max_per_host, timeout=timeout):
+        super().__init__()
+        # POST requests are not idempotent and therefore never retried, see Retry.DEFAULT_ALLOWED_METHODS
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=[429, 500, 502, 503, 504],
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_maxsize=pool_maxsize, max_retries=retry)
+        self.mount('http://', adapter)
+        self.mount('https://', adapter)
+
+        self.timeout = timeout
+        self.max_per_host = max_per_host
+        self._hosts: dict[str, BoundedSemaphore] = {}
+        self._hosts_lock = Lock()
+
+    def _host_limit(self, url) -> BoundedSemaphore:
+        host = urlparse(url).netloc
+        with self._hosts_lock:
+            if host not in self._hosts:
+                self._hosts[host] = BoundedSemaphore(self.max_per_host)
+            return self._hosts[host]
+
+    def request(self, method, url, *args, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        with self._host_limit(url):
+            return super().request(method, url, *args, **kwargs)
+
+
+def get_session() -> Session:
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = Session(retries, backoff_factor, pool_maxsize, max_per_host, timeout)
+        return _session
+
+
+def configure(**settings):
+    """changes the module settings, e.g. `configure(retries=5)`, and starts a new session with them"""
+    global _session
+    for key, value in settings.items():
+        if key not in ['timeout', 'retries', 'backoff_factor', 'pool_maxsize', 'max_per_host']:
+            raise TypeError(f'unknown session setting {key}')
+        globals()[key] = value
+
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+
+
+def get(url, **kwargs) -> requests.Response:
+    return get_session().get(url, **kwargs)
+
+
+def head(url, **kwargs) -> requests.Response:
+    return get_session().head(url, **kwargs)
+
+
+def post(url, **kwargs) -> requests.Response:
+    return get_session().post(url, **kwargs)
@@ -0,0 +1,149 @@
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING
+
+try:
+    from .event import Event
+except ImportError:
+    from event import Event
+
+if TYPE_CHECKING:
+    from .schedule import Schedule
+
+
+@dataclass
+class Conflict:
+    room: str
+    first: Event
+    second: Event
+
+    @property
+    def overlap(self) -> timedelta:
+        return min(self.first.end, self.second.end) - self.second.start
+
+    def __str__(self):
+        return f"{self.room}: {self.first['title']} ({self.first.start:%a %H:%M}–{self.first.end:%H:%M}) " \
+            f"and {self.second['title']} ({self.second.start:%a %H:%M}–{self.second.end:%H:%M})"
+
+
+@dataclass
+class Gap:
+    room: str
+    before: Event
+    after: Event
+
+    @property
+    def duration(self) -> timedelta:
+        return self.after.start - self.before.end
+
+    def __str__(self):
+        return f"{self.room}: {self.duration} free after {self.before['title']} ({self.before.end:%a %H:%M})"
+
+
+@dataclass
+class ConflictReport:
+    # events starting at the same time in the same room
+    double_bookings: list[Conflict] = field(default_factory=list)
+    # events starting before the previous event in the same room has ended
+    overlaps: list[Conflict] = field(default_factory=list)
+    gaps: list[Gap] = field(default_factory=list)
+
+    def __bool__(self):
+        return bool(self.double_bookings or self.overlaps)
+
+    def print(self, show_gaps=False):
+        print(f"  {len(self.double_bookings)} double bookings, {len(self.overlaps)} overlaps, {len(self.gaps)} gaps")
+        for conflict in self.double_bookings:
+            print(f"   double booking {conflict}")
+        for conflict in self.overlaps:
+            print(f"   overlap of {conflict.overlap} {conflict}")
+        if show_gaps:
+            for gap in self.gaps:
+                print(f"   gap {gap}")
+
+
+class RoomTimeline:
+    """events of one room over all days, sorted by start, with binary search lookups"""
+    __slots__ = ('room', 'events', 'starts', 'max_ends')
+
+    def __init__(self, room: str, events: list[Event]):
+        self.room = room
+        self.events = sorted(events, key=lambda e: (e.start, e.end))
+        self.starts = [e.start for e in self.events]
+        # latest end of all events up to this position, ascending even if events overlap
+        self.max_ends = []
+        for event in self.events:
+            self.max_ends.append(max(self.max_ends[-1], event.end) if self.max_ends else event.end)
+
+    def __len__(self):
+        return len(self.events)
+
+    def between(self, start: datetime, end: datetime) -> list[Event]:
+        """events overlapping the time span from start to end"""
+        # everything before first has ended before start, everything from last on starts after end
+        first = bisect_right(self.max_ends, start)
+        last = bisect_left(self.starts, end)
+        return [e for e in self.events[first:last] if e.end > start]
+
+    def now(self, time: datetime) -> list[Event]:
+        """events running at time"""
+        first = bisect_right(self.max_ends, time)
+        last = bisect_right(self.starts, time)
+        return [e for e in self.events[first:last] if e.end > time]
+
+    def next(self, time: datetime) -> Event | None:
+        """first event starting after time"""
+        i = bisect_right(self.starts, time)
+        return self.events[i] if i < len(self.events) else None
+
+    def json(self) -> dict:
+        """columns of unix timestamps, which consumers can binary search like the methods above"""
+        return {
+            'start': [int(e.start.timestamp()) for e in self.events],
+            'end': [int(e.end.timestamp()) for e in self.events],
+            'max_end': [int(end.timestamp()) for end in self.max_ends],
+            'guid': [e['guid'] for e in self.events],
+            'title': [e['title'] for e in self.events],
+        }
+
+
+class Timeline(dict[str, RoomTimeline]):
+    """per room interval index of a schedule, built in O(n log n)"""
+
+    def __init__(self, schedule: 'Schedule'):
+        rooms: dict[str, list[Event]] = {}
+        for day in schedule.days():
+            for room, events in day['rooms'].items():
+                rooms.setdefault(room, []).extend(schedule._hydrated(events))
+
+        super().__init__((room, RoomTimeline(room, events)) for room, events in rooms.items())
+
+    def room(self, room: str) -> RoomTimeline:
+        # rooms without events have an empty timeline
+        return self.get(room) or RoomTimeline(room, [])
+
+    def json(self) -> dict:
+        return {room: timeline.json() for room, timeline in self.items()}
+
+    def conflicts(self, min_gap=timedelta(minutes=30), max_gap=timedelta(hours=6)) -> ConflictReport:
+        """
+        Finds double bookings and overlaps of events in the same room in one pass over the sorted events.
+        Free time between min_gap and max_gap is reported as gap, longer breaks (e.g. over night) are ignored.
+        """
+        report = ConflictReport()
+        for room, timeline in self.items():
+            previous = latest = None
+            for event in timeline.events:
+                if previous and event.start == previous.start:
+                    report.double_bookings.append(Conflict(room, previous, event))
+                elif latest and event.start < latest.end:
+                    report.overlaps.append(Conflict(room, latest, event))
+                elif latest and min_gap <= event.start - latest.end < max_gap:
+                    report.gaps.append(Gap(room, latest, event))
+
+                if latest is None or event.end > latest.end:
+                    latest = event
+                previous = event
+
+        return report
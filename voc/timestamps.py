@@ -0,0 +1,21 @@
+from datetime import datetime
+from functools import lru_cache
+
+import dateutil.parser
+
+
+@lru_cache(maxsize=16384)
+def _fromisoformat(value: str) -> datetime:
+    return datetime.fromisoformat(value)
+
+
+def parse_datetime(value: str) -> datetime:
+    """
+    Parses the timestamps of schedules, nearly always strict ISO 8601 from pretalx or frab.
+    Those are parsed via datetime.fromisoformat() and memoized, as the same day starts or
+    time slots occur over and over again. Everything else falls back to dateutil.
+    """
+    try:
+        return _fromisoformat(value)
+    except (ValueError, TypeError):
+        return dateutil.parser.parse(value)
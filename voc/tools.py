@@ -6,6 +6,9 @@ from os import path
 import os
 import uuid
 import json
+import enum
+import math
+import codecs
 import re
 import sys
 
@@ -15,6 +18,12 @@ from bs4 import Tag
 
 import __main__
 
+# orjson is optional, but serializes large schedules a lot faster
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 sos_ids = {}
 last_edited = {}
 next_id = 1000
@@ -75,7 +84,8 @@ def load_sos_ids():
 # write sos_ids to disk
 def store_sos_ids():
     global sos_ids
-    with open("_sos_ids.json", "w") as fp:
+    from . import publish
+    with publish.open_json("_sos_ids.json") as fp:
         json.dump(sos_ids, fp, indent=4)
 
 
@@ -169,9 +179,9 @@ _RE_STR2TIMEDELTA = re.compile(r'((?P<hours>\d+?)hr?\s*)?((?P<minutes>\d+?)m(ins
 def str2timedelta(s) -> timedelta:
     if ':' in s:
         parts = s.split(':')
-        kwargs = {'seconds': int(parts.pop())}
-        if parts:
-            kwargs['minutes'] = int(parts.pop())
+        # schedule durations are hh:mm (see format_duration), seconds only follow as third part
+        kwargs = {'seconds': int(parts.pop())} if len(parts) > 2 else {}
+        kwargs['minutes'] = int(parts.pop())
         if parts:
             kwargs['hours'] = int(parts.pop())
         if parts:
@@ -203,14 +213,86 @@ def load_json(filename):
     return data
 
 
+# stdlib json escapes everything outside of printable ASCII (ensure_ascii), orjson emits plain UTF-8
+def _json_escape_non_ascii(error: UnicodeEncodeError):
+    return json.encoder.encode_basestring_ascii(error.object[error.start:error.end])[1:-1], error.end
+
+
+codecs.register_error('json_escape', _json_escape_non_ascii)
+
+
+def _orjson_compatible(data) -> bool:
+    """False if data contains values orjson would serialize differently from the stdlib encoder"""
+    stack = [data]
+    while stack:
+        value = stack.pop()
+        if value is None or isinstance(value, (str, int)) and not isinstance(value, enum.Enum):
+            continue
+        if isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+        elif isinstance(value, float):
+            # orjson writes NaN/Infinity as null and exponents without sign, e.g. 1e16 instead of 1e+16
+            if not math.isfinite(value) or 'e' in repr(value):
+                return False
+        elif isinstance(value, (uuid.UUID, enum.Enum)):
+            # serialized natively by orjson, but via cls.default() (or not at all) by the stdlib encoder
+            return False
+    return True
+
+
+def dumps_json(data, cls=json.JSONEncoder) -> str:
+    """
+    Returns the same string as json.dumps(data, indent=2, cls=cls),
+    but uses orjson or the C encoder when available instead of the pure-Python encoder.
+    """
+    if orjson is not None and _orjson_compatible(data):
+        try:
+            # datetimes and dataclasses go through cls.default() like with the stdlib encoder
+            option = orjson.OPT_INDENT_2 | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+            return orjson.dumps(data, default=cls().default, option=option) \
+                .decode('utf-8') \
+                .encode('ascii', 'json_escape') \
+                .decode('ascii') \
+                .replace('\x7f', '\\u007f')
+        except orjson.JSONEncodeError:
+            # e.g. non-str keys or integers > 64 bit, which only the stdlib encoder can handle
+            pass
+
+    return json.dumps(data, indent=2, cls=cls)
+
+
+def dump_json(data, fp, cls=json.JSONEncoder, chunk_size=65536):
+    """Writes the same output as json.dump(data, fp, indent=2, cls=cls) to fp"""
+    # the C encoder supports indent since python 3.14, but only for one-shot encoding
+    if orjson is not None or sys.version_info >= (3, 14):
+        fp.write(dumps_json(data, cls=cls))
+        return
+
+    # json.dump() calls fp.write() for every single token, so we collect them into larger chunks
+    chunk = []
+    size = 0
+    for token in cls(indent=2).iterencode(data):
+        chunk.append(token)
+        size += len(token)
+        if size >= chunk_size:
+            fp.write(''.join(chunk))
+            chunk = []
+            size = 0
+    fp.write(''.join(chunk))
+
+
 def get_version():
     global VERSION
     try:
         if VERSION is None:
+            from git import Repo
             repo = Repo(path=__file__, search_parent_directories=True)
             sha = repo.head.object.hexsha
             VERSION = repo.git.rev_parse(sha, short=5)
-    except ValueError:
+    # e.g. GitPython is missing or we are not running from a git checkout
+    except Exception:
         pass
     return VERSION
 
@@ -267,12 +349,7 @@ def ensure_folders_exist(output_dir, secondary_output_dir):
 
 def export_filtered_schedule(output_name, parent_schedule, filter):
     write('\nExporting {} schedule... '.format(output_name))
-    schedule = parent_schedule.copy(output_name)
-    for day in schedule.days():
-        room_keys = list(day['rooms'].keys())
-        for room_key in room_keys:
-            if not filter(room_key):
-                del day['rooms'][room_key]
+    schedule = parent_schedule.copy(output_name, rooms=filter)
 
     print('\n  {}: '.format(output_name))
     for room in schedule.rooms():
@@ -287,16 +364,27 @@ def git(args):
 
 
 def commit_changes_if_something_relevant_changed(schedule):
-    content_did_not_change = os.system("/usr/bin/env git diff -U0 --no-prefix | grep -e '^[+-]  ' | grep -v version > /dev/null")
+    """
+    Commits and pushes the exported files, if the schedule or any other exported file (derived schedules,
+    events/*.json, ...) changed by more than the version.
+    Returns the ScheduleDiff, so pushers can process only the changed events.
+    """
+    changes = schedule.changes()
 
-    if content_did_not_change:
+    from . import publish
+
+    # export() reports every schedule.json as changed only if its structural diff is not empty,
+    # event files and meta.json only if their content changed besides the version
+    if not publish.relevant():
         print('nothing relevant changed, reverting to previous state')
-        git('reset --hard')
+        publish.revert()
         exit(0)
 
-    git('add *.json *.xml events/*.json')
-    git('commit -m "version {}"'.format(schedule.version()))
-    git('push')
+    if changes:
+        changes.print()
+
+    publish.commit('version {}'.format(schedule.version()))
+    return changes
 
 
 # remove talks starting before 9 am
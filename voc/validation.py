@@ -0,0 +1,131 @@
+import re
+import json
+import threading
+from collections.abc import Mapping
+from dataclasses import dataclass
+from functools import cache
+from os import path
+
+from lxml import etree
+
+# jsonschema is a dependency, but without it exports still work – only schedule.json files are not validated
+try:
+    import jsonschema
+except ImportError:
+    jsonschema = None
+
+try:
+    from .logger import Logger
+except ImportError:
+    from logger import Logger
+
+
+log = Logger(__name__)
+
+validator_dir = path.join(path.dirname(path.dirname(path.abspath(__file__))), "validator")
+xml_schema_file = path.join(validator_dir, "xsd", "schedule.xml.xsd")
+# xml_schema_file = path.join(validator_dir, "xsd", "schedule-without-person.xml.xsd")
+json_schema_file = path.join(validator_dir, "json", "schema.json")
+
+# regular expressions, errors matching one of them are not reported
+filters: list[re.Pattern] = []
+
+
+@dataclass
+class ValidationError:
+    message: str
+    file: str | None = None
+    line: int | None = None
+    path: str | None = None
+
+    def __str__(self):
+        # similar to the output of xmllint, so existing filters still match
+        location = ":".join(str(x) for x in [self.file, self.line or self.path] if x)
+        return f"{location}: {self.message}" if location else self.message
+
+
+def set_filter(patterns: str | list[str]):
+    if isinstance(patterns, str):
+        patterns = [patterns]
+    filters.extend(re.compile(p) for p in patterns)
+
+
+def apply_filter(errors: list[ValidationError]) -> list[ValidationError]:
+    return [e for e in errors if not any(f.search(str(e)) for f in filters)]
+
+
+# lxml schema objects must not be shared between threads, e.g. of fanout.export_all()
+_local = threading.local()
+
+
+def xml_schema(schema_file=xml_schema_file) -> etree.XMLSchema:
+    """compiles the XSD once per thread and reuses it for every following validation"""
+    schemas = _local.__dict__.setdefault("schemas", {})
+    if schema_file not in schemas:
+        schemas[schema_file] = etree.XMLSchema(etree.parse(schema_file))
+    return schemas[schema_file]
+
+
+@cache
+def json_validator(schema_file=json_schema_file):
+    with open(schema_file, "r") as fp:
+        schema = json.load(fp)
+    cls = jsonschema.validators.validator_for(schema)
+    # events are Mappings, so schedules can be validated without serializing them first
+    type_checker = cls.TYPE_CHECKER.redefine("object", lambda checker, instance: isinstance(instance, Mapping))
+    return jsonschema.validators.extend(cls, type_checker=type_checker)(schema)
+
+
+@cache
+def _warn_missing_jsonschema():
+    log.warning("jsonschema is not installed, schedule.json files are NOT validated – install it, e.g. via `pip install jsonschema`")
+
+
+def validate_xml(document, file=None) -> list[ValidationError]:
+    """validates a schedule.xml file path or element tree against the XSD"""
+    if isinstance(document, str):
+        file = file or document
+        document = etree.parse(document)
+
+    schema = xml_schema()
+    if schema.validate(document):
+        return []
+
+    return [
+        ValidationError(message=entry.message, file=file, line=entry.line)
+        for entry in schema.error_log
+    ]
+
+
+def validate_json(data, file=None) -> list[ValidationError]:
+    """validates a schedule.json file path or already parsed document, e.g. Schedule.json(), against the JSON schema"""
+    if jsonschema is None:
+        _warn_missing_jsonschema()
+        return []
+
+    if isinstance(data, str):
+        file = file or data
+        with open(data, "r") as fp:
+            data = json.load(fp)
+
+    return [
+        ValidationError(message=error.message, file=file, path="/".join(str(x) for x in error.absolute_path))
+        for error in json_validator().iter_errors(data)
+    ]
+
+
+def report(file: str, errors: list[ValidationError]) -> bool:
+    """prints the unfiltered errors like xmllint would, returns True if the file is valid"""
+    visible = apply_filter(errors)
+    for error in visible:
+        print(error)
+
+    if len(visible) < len(errors):
+        log.warning(f"  ({len(errors) - len(visible)} validation errors hidden by validator_filter)")
+
+    if errors:
+        print(f"{file} fails to validate")
+        return False
+
+    print(f"{file} validates")
+    return True
@@ -3,25 +3,29 @@
 from os import getenv
 from sys import stdout
 import json
-import time
+import asyncio
 import argparse
-import requests
 import base64
 import uuid
+from typing import Callable
 
 from gql import Client, gql
 from gql.transport.aiohttp import AIOHTTPTransport
-# from gql.transport.exceptions import TransportQueryError
+from gql.transport.exceptions import TransportQueryError
 
 try:
     from .schedule import Schedule
     from .schedulexml import ScheduleXML
+    from . import session
+    from .ledger import Ledger
     from .tools import gen_uuid, normalise_string
 
 
 except ImportError:
     from schedule import Schedule
     from schedulexml import ScheduleXML
+    import session
+    from ledger import Ledger
     from tools import gen_uuid, normalise_string
 
 
@@ -70,7 +74,22 @@ CREATE TABLE event_event (
 );
 '''
 
-def add_event(conference, event, args):
+UPSERT_EVENT = gql('''
+  mutation upsertEvent($input: UpsertEventInput!) {
+    upsertEvent(input: $input) {
+      clientMutationId
+    }
+  }
+''')
+
+# number of upsertEvent mutations in flight at the same time
+concurrency = int(getenv('IMPORT_CONCURRENCY', 8))
+# failed mutations are retried after backoff, 2 × backoff, 4 × backoff, … seconds
+retries = 3
+backoff = 1.0
+
+
+def event_input(conference, event, args):
 
     # TODO: use voc.tools or make this configurable e.g. based on conference year
     voc_slug = f"{conference['slug']}-{event['id']}-{event['slug'] \
@@ -78,15 +97,6 @@ def add_event(conference, event, args):
     #voc_slug = f"fossgis{event['slug']}"
     #assert event['slug'], "slug required"
 
-    url = event.url()
-    # Check if url returns 200
-    try:
-        response = requests.head(url, timeout=5)
-        if response.status_code != 200:
-            print(f"\n Warning: URL {url} returned status code {response.status_code}")
-    except Exception as e:
-        print(f"\n Warning: Could not verify URL {url}: {e}")
-
     guid = event['guid']
     if not guid:
         guid = gen_uuid(voc_slug)
@@ -108,7 +118,7 @@ def add_event(conference, event, args):
             else:
                 raise ValueError("Decoded value is not 16 bytes")
 
-    data = {
+    return {
         "event": {
             'guid': guid,
             'talkid': int(event['id']),
@@ -122,43 +132,95 @@ def add_event(conference, event, args):
             'language': event['language'] or DEFAULT_LANGUAGE,
             'room': event['room'],
             'track': event.get('track', None),
-            'url': url,
+            'url': event.url(),
             'persons': '\n'.join([p for p in event.persons()]),
             # 'published': False, -> defaults to false
             'conferenceId': conference['id'],
         }
     }
 
-    query = gql('''
-      mutation upsertEvent($input: UpsertEventInput!) {
-        upsertEvent(input: $input) {
-          clientMutationId
-        }
-      }
-    ''')
 
+def check_url(url):
+    # Check if url returns 200
     try:
-        client.execute(query, variable_values={'input': data})
-        stdout.write('.')
-        stdout.flush()
+        response = session.head(url, timeout=5)
+        if response.status_code != 200:
+            print(f"\n Warning: URL {url} returned status code {response.status_code}")
     except Exception as e:
+        print(f"\n Warning: Could not verify URL {url}: {e}")
+
+
+async def push_events(conference, events, args, on_pushed: Callable | None = None) -> dict[str, Exception]:
+    """
+    Upserts the events with at most `concurrency` mutations in flight, returns the errors of failed events by guid.
+    URLs are checked in parallel to the mutations, every URL only once per run.
+    Failed mutations are retried with exponential backoff, while the other events continue.
+    on_pushed is called with every successfully pushed event.
+    """
+    url_checks: dict[str, asyncio.Task] = {}
+    in_flight = asyncio.Semaphore(concurrency)
+    failed = {}
+
+    async def push(gql_session, event):
+        try:
+            data = event_input(conference, event, args)
+        except Exception as e:
+            print(f"\n Error: could not convert event {event['guid']}: {e}")
+            failed[event['guid']] = e
+            return
+
+        url = data['event']['url']
+        if url not in url_checks:
+            url_checks[url] = asyncio.create_task(asyncio.to_thread(check_url, url))
+
+        for attempt in range(retries + 1):
+            try:
+                async with in_flight:
+                    await gql_session.execute(UPSERT_EVENT, variable_values={'input': data})
+                stdout.write('.')
+                stdout.flush()
+                if on_pushed:
+                    on_pushed(event)
+                return
+            except TransportQueryError as e:
+                # rejected by the server, sending it again would not help
+                error = e
+                break
+            except Exception as e:
+                error = e
+                if attempt < retries:
+                    await asyncio.sleep(backoff * 2 ** attempt)
+
         print(json.dumps(data, indent=2))
         print()
-        print(e)
+        print(error)
         print()
-        time.sleep(10)
+        failed[event['guid']] = error
+
+    async with Client(transport=AIOHTTPTransport(url=transport.url, headers=transport.headers)) as gql_session:
+        await asyncio.gather(*(push(gql_session, event) for event in events))
+    await asyncio.gather(*url_checks.values())
+
+    return failed
 
 
-def remove_event(event_guid):
+def add_event(conference, event, args) -> dict[str, Exception]:
+    """upserts a single event, returns its error by guid if it failed, like push_events()"""
+    return asyncio.run(push_events(conference, [event], args))
+
+
+def remove_event(event_guid) -> bool:
     try:
         client.execute(gql('''
           mutation deleteEvent($guid: UUID!) {
             deleteEvent(input: {guid: $guid}) { deletedEventNodeId }
           }
         '''), variable_values={'guid': event_guid})
+        return True
     except Exception as e:
         print(e)
         print()
+        return False
 
 
 class VoctoImport:
@@ -177,16 +239,39 @@ class VoctoImport:
             raise Exception(f'Unknown conference {acronym}')
         pass
 
-    def upsert_event(self, event, args):
-        add_event(self.conference, event, args)
+    def upsert_event(self, event, args) -> dict[str, Exception]:
+        return add_event(self.conference, event, args)
+
+    def upsert_events(self, events, args) -> dict[str, Exception]:
+        return asyncio.run(push_events(self.conference, list(events), args))
+
+    def sync(self, events, args, ledger: Ledger, complete=True) -> dict[str, Exception]:
+        """
+        Pushes only the events which changed since their last push recorded in the ledger and,
+        if events are the complete schedule, removes the ones which are gone
+        """
+        target = f"voctoimport/{self.conference['slug']}"
+        pending = ledger.pending(target, events, complete)
+        print(f'  {pending}')
 
-    def depublish_event(self, event_guid):
-        remove_event(event_guid)
+        hashes = {event['guid']: hash for event, hash in pending.upserts}
+        failed = asyncio.run(push_events(
+            self.conference, [event for event, _ in pending.upserts], args,
+            on_pushed=lambda event: ledger.mark_pushed(target, [(event['guid'], hashes[event['guid']])])
+        ))
+
+        for guid in pending.removed:
+            if self.depublish_event(guid):
+                ledger.mark_removed(target, [guid])
+        return failed
+
+    def depublish_event(self, event_guid) -> bool:
+        return remove_event(event_guid)
 
 
 def push_schedule(schedule: Schedule, create=False):
     instace = VoctoImport(schedule, create)
-    schedule.foreach_event(lambda event: instace.upsert_event(event, args))
+    instace.upsert_events(schedule.events(), args)
 
 
 def run(args: argparse.Namespace):
@@ -201,21 +286,16 @@ def run(args: argparse.Namespace):
 
     instace = VoctoImport(schedule)
 
-    def upsert_event(event):
-        if (len(args.room) == 0 or event['room'] in args.room) and event['do_not_record'] is not True:
-            instace.upsert_event(event, args)
-
     try:
-
-        if args.id or args.guid:
-            for event in schedule.events():
-                if (args.id and event['id'] in args.id) or (args.guid and event['guid'] in args.guid):
-                    upsert_event(event)
-        
+        events = schedule.query(room=args.room or None, guid_in=args.guid, id_in=args.id, filter=lambda e: e['do_not_record'] is not True)
+        if args.ledger:
+            # with filters only a part of the schedule is pushed, so nothing else can be considered as removed
+            complete = not (args.room or args.guid or args.id)
+            failed = instace.sync(events, args, Ledger(args.ledger), complete)
         else:
-            schedule.foreach_event(upsert_event)
+            failed = instace.upsert_events(events, args)
 
-        print('\nimport done')
+        print(f'\nimport done, {len(failed)} events failed' if failed else '\nimport done')
 
     except KeyboardInterrupt:
         print('\nimport aborted by user')
@@ -239,10 +319,13 @@ if __name__ == '__main__':
 
     # optional flags
     parser.add_argument('--overwrite-slug', help='rebuild slug form title', action='store_true', default=False)
+    parser.add_argument('--concurrency', type=int, default=concurrency, help='number of events pushed in parallel')
+    parser.add_argument('--ledger', action='store', help='sqlite file with the state of previous pushes, only changed events are pushed')
 
     if getenv('IMPORT_TOKEN') is None:
         print('WARNING: no IMPORT_TOKEN environment variable set, but required for write access')
         print('Set IMPORT_TOKEN to a valid token to avoid this warning')
 
     args = parser.parse_args()
+    concurrency = args.concurrency
     run(args)
@@ -1,8 +1,7 @@
 import re
 import ics
-import requests
 
-from voc import GenericConference
+from voc import GenericConference, httpcache
 from voc.event import Event, EventSourceInterface
 from voc.schedule import Schedule, ScheduleException
 from voc.tools import format_duration, gen_person_uuid
@@ -17,7 +16,7 @@ class WebcalConference(GenericConference, EventSourceInterface):
             raise ScheduleException('  has no schedule url yet – ignoring')
 
         url = re.sub(r'^webcal', 'http', self.schedule_url)
-        data = requests.get(url, timeout=10).text
+        data = httpcache.get(url, timeout=10).text
         cal = ics.Calendar(data)
 
         schedule = template.copy(self['name']) or Schedule(conference=self)
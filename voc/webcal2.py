@@ -1,8 +1,7 @@
 import re
 import icalendar
-import requests
 
-from voc import GenericConference
+from voc import GenericConference, httpcache
 from voc.event import Event, EventSourceInterface
 from voc.schedule import Schedule, ScheduleException
 from voc.tools import format_duration, gen_person_uuid, gen_uuid
@@ -17,7 +16,7 @@ class WebcalConference2(GenericConference, EventSourceInterface):
             raise ScheduleException('  has no schedule url yet – ignoring')
 
         url = re.sub(r'^webcal', 'http', self.schedule_url)
-        r = requests.get(url, timeout=10)
+        r = httpcache.get(url, timeout=10)
         if r.status_code != 200:
             raise ScheduleException(f'  Failed to retrieve iCal feed: Error ({r.status_code})')
         cal = icalendar.Calendar.from_ical(r.text)
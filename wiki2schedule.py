@@ -20,6 +20,7 @@ import urllib.parse
 
 # some functions used in multiple files of this collection
 import voc.tools
+from voc import publish
 from voc.schedule import Schedule, Event
 
 tz = pytz.timezone("Europe/Amsterdam")
@@ -119,7 +120,7 @@ def generate_wiki_schedules(wiki_url):
     process_wiki_events(data, wiki_schedule, workshop_schedule)
 
     # write imported data from wiki to one merged file
-    with open("sessions_complete.json", "w") as fp:
+    with publish.open_json("sessions_complete.json") as fp:
         json.dump(sessions_complete, fp, indent=2)
 
     wiki_schedule.export("wiki")
@@ -458,7 +459,7 @@ def process_wiki_events(
     store_last_edited()
 
     if debug:
-        with open("sessions_complete.json", "w") as fp:
+        with publish.open_json("sessions_complete.json") as fp:
             json.dump(sessions_complete, fp, indent=2)
 
     print(
@@ -603,7 +604,7 @@ def load_sos_ids():
 
 def store_sos_ids():
     # write sos_ids to disk
-    with open("_sos_ids.json", "w") as fp:
+    with publish.open_json("_sos_ids.json") as fp:
         json.dump(voc.tools.sos_ids, fp, indent=4)
 
 
@@ -619,7 +620,7 @@ def load_last_edited():
 
 def store_last_edited():
     # write last_edited to disk
-    with open("_last_edited.json", "w") as fp:
+    with publish.open_json("_last_edited.json") as fp:
         json.dump(voc.tools.last_edited, fp, indent=4)
 
 
@@ -630,8 +631,4 @@ if __name__ == "__main__":
     generate_wiki_schedules(wiki_url)
 
     if not local or options.git:
-        os.system("/usr/bin/env git add *.json *.xml")
-        os.system(
-            "/usr/bin/env git commit -m 'updates from " + str(datetime.now()) + "'"
-        )
-        # os.system("/usr/bin/env git push")
+        publish.commit("updates from " + str(datetime.now()), push=False)
@@ -9,6 +9,7 @@ import requests
 from bs4 import BeautifulSoup
 
 import voc.tools
+from voc import publish
 from voc.tools import gen_uuid, write
 from voc.schedule import Event, Schedule
 
@@ -249,9 +250,7 @@ def main():
     schedule.export('wiki')
 
     if not local:
-        os.system("git add *.json *.xml")
-        os.system("git commit -m 'updates from " + str(datetime.now()) + "'")
-        os.system("git push")
+        publish.commit("updates from " + str(datetime.now()))
 
     print('')
     print('end')